@@ -4,21 +4,61 @@ Manage your everyday tasks in convenient way.
 Main application logic.
 """
 
+import os
 from flask import Flask, render_template
-from flask_login import LoginManager
-from models import db, User
+from flask_login import LoginManager, current_user
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db
 from auth import auth as auth_blueprint
 from tasks import tasks as tasks_blueprint
-from database import init_database
+from export import export as export_blueprint
+from importer import importer as importer_blueprint, import_todo_command
+from database import init_database, configure_engine, seed_demo_command
+from migrations import db_upgrade_command, db_version_command
+from cache import user_cache, CachedUser
+from recurrence import recurrence_cache
+from events import events as events_blueprint, event_hub
+from sync import sync as sync_blueprint, purge_tombstones_command
+from archive import archive as archive_blueprint, archive_tasks_command
+from ratelimit import rate_limiter
+from shards import shard_directory, shard_status_command, shard_move_command, shard_rebalance_command
+from config import config
+from stats import get_user_stats, rebuild_stats_command
+from scheduler import reminder_scheduler, run_reminders_command
+from metrics import metrics
+from synthetic import seed_synthetic_command
+from loadtest import loadtest_command
 
 
-def create_app() -> Flask:
+def create_app(config_name: str | None = None, overrides: dict | None = None) -> Flask:
     app = Flask(__name__)
-    app.config["SECRET_KEY"] = "1"
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///taskflow.db"
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    config_name = config_name or os.environ.get("TASKFLOW_CONFIG", "default")
+    app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
+    if not app.config.get("SECRET_KEY"):
+        raise RuntimeError("SECRET_KEY environment variable must be set.")
+
+    # Persist compiled templates so new workers skip recompiling them
+    cache_dir = app.config.get("JINJA_BYTECODE_CACHE_DIR") or os.path.join(
+        app.instance_path, "jinja_cache"
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
+
+    # Behind a reverse proxy, take the client address from X-Forwarded-For
+    hops = app.config.get("PROXY_FIX_HOPS", 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     db.init_app(app)
+    configure_engine(app)
+    metrics.init_app(app)
+    user_cache.init_app(app)
+    recurrence_cache.init_app(app)
+    event_hub.init_app(app)
+    rate_limiter.init_app(app)
+    shard_directory.init_app(app)
     init_database(app)
     
     login_manager = LoginManager()
@@ -26,19 +66,43 @@ def create_app() -> Flask:
     login_manager.init_app(app)
 
     @login_manager.user_loader
-    def load_user(user_id: int) -> User | None:
-        return User.query.get(int(user_id))
+    def load_user(user_id: str) -> CachedUser | None:
+        # Served from the per-process cache to skip a query per request
+        return user_cache.get(int(user_id))
 
     @app.route("/")
     def index():
-        return render_template("index.html")
+        # current_user is a cached snapshot without relationships; counts come from the counters
+        stats = get_user_stats(current_user.id) if current_user.is_authenticated else None
+        return render_template("index.html", stats=stats)
 
     app.register_blueprint(auth_blueprint)
     app.register_blueprint(tasks_blueprint)
+    app.register_blueprint(export_blueprint)
+    app.register_blueprint(importer_blueprint)
+    app.register_blueprint(events_blueprint)
+    app.register_blueprint(sync_blueprint)
+    app.register_blueprint(archive_blueprint)
+
+    app.cli.add_command(db_upgrade_command)
+    app.cli.add_command(db_version_command)
+    app.cli.add_command(seed_demo_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(purge_tombstones_command)
+    app.cli.add_command(archive_tasks_command)
+    app.cli.add_command(shard_status_command)
+    app.cli.add_command(shard_move_command)
+    app.cli.add_command(shard_rebalance_command)
+    app.cli.add_command(run_reminders_command)
+    app.cli.add_command(import_todo_command)
+    app.cli.add_command(seed_synthetic_command)
+    app.cli.add_command(loadtest_command)
+
+    reminder_scheduler.init_app(app)
 
     return app
 
 
 if __name__ == "__main__":
     app = create_app()
-    app.run(debug=True)
+    app.run(debug=app.debug)
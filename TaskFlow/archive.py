@@ -0,0 +1,217 @@
+"""
+Task archive:
+Moves tasks completed long ago out of the tasks table into archived_tasks
+in batches, so the hot table only holds tasks people still work with.
+Archived tasks are listed on demand and move back when reopened.
+"""
+
+import click
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask.cli import with_appcontext
+from flask_login import login_required, current_user
+from sqlalchemy import delete, insert, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from werkzeug.wrappers import Response
+from models import db, make_excerpt, ArchivedTask, Category, Task, TaskTombstone
+from shards import shard_names, using_shard
+from stats import apply_deltas, record_task_change, task_facets
+from tasks import publish_task
+
+
+archive = Blueprint("archive", __name__)
+
+# Fields copied between the two tables; ids are kept
+MOVED_FIELDS = (
+    "id", "title", "description", "priority", "category_id", "created_at", "updated_at",
+    "due_date", "completed_at", "recurrence_id", "occurrence", "user_id",
+)
+
+
+def archive_batch(cutoff: datetime, keep_occurrences_after: datetime, batch_size: int) -> int:
+    """
+    Move up to `batch_size` tasks completed before `cutoff` to the archive.
+    Returns how many moved. Caller commits.
+    """
+    ids = db.session.scalars(
+        select(Task.id)
+        .where(
+            Task.completed.is_(True),
+            Task.completed_at < cutoff,
+            # Occurrences still in the dashboard window would show as pending again
+            or_(Task.occurrence.is_(None), Task.occurrence < keep_occurrences_after),
+        )
+        .order_by(Task.completed_at)
+        .limit(batch_size)
+    ).all()
+    if not ids:
+        return 0
+
+    # Deleting with RETURNING archives exactly the rows removed, even if one
+    # was reopened since the select
+    rows = db.session.execute(
+        delete(Task)
+        .where(Task.id.in_(ids), Task.completed.is_(True), Task.completed_at < cutoff)
+        .returning(*(getattr(Task, field) for field in MOVED_FIELDS), Task.completed)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not rows:
+        return 0
+
+    now = datetime.now()
+    db.session.execute(
+        insert(ArchivedTask),
+        [{field: getattr(row, field) for field in MOVED_FIELDS} | {"archived_at": now} for row in rows],
+    )
+
+    # Archived tasks leave the counters, and syncing clients drop their copies
+    deltas: dict[int, Counter] = {}
+    for row in rows:
+        deltas.setdefault(row.user_id, Counter()).subtract(task_facets(row))
+    for user_id, counter in deltas.items():
+        apply_deltas(user_id, counter)
+    db.session.execute(
+        insert(TaskTombstone),
+        [{"task_id": row.id, "user_id": row.user_id, "deleted_at": now} for row in rows],
+    )
+    return len(rows)
+
+
+def archive_completed(days: int, batch_size: int, echo=None) -> int:
+    """Archive tasks completed more than `days` ago, committing each batch."""
+    now = datetime.now()
+    cutoff = now - timedelta(days=days)
+    keep_after = now - timedelta(days=current_app.config.get("RECURRENCE_LOOKBACK_DAYS", 7))
+
+    total = 0
+    while True:
+        try:
+            moved = archive_batch(cutoff, keep_after, batch_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        total += moved
+        if echo and moved:
+            echo(f"Archived {total} tasks...")
+        if moved < batch_size:
+            return total
+
+
+def restore_task(task_id: int, user_id: int) -> int | None:
+    """
+    Move an archived task back to the tasks table as incomplete.
+    Returns its id, or None if the user has no such archived task. Caller commits.
+    """
+    row = db.session.execute(
+        delete(ArchivedTask)
+        .where(ArchivedTask.id == task_id, ArchivedTask.user_id == user_id)
+        .returning(*(getattr(ArchivedTask, field) for field in MOVED_FIELDS))
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+
+    # A fresh updated_at puts it back into sync clients' change streams
+    values = dict(
+        row._mapping,
+        excerpt=make_excerpt(row.description),
+        completed=False,
+        completed_at=None,
+        updated_at=datetime.now(),
+    )
+    restore = insert(Task).returning(Task.id, Task.completed, Task.priority, Task.category_id)
+    try:
+        with db.session.begin_nested():
+            task = db.session.execute(restore.values(values)).first()
+        db.session.execute(
+            delete(TaskTombstone).where(
+                TaskTombstone.task_id == task_id, TaskTombstone.user_id == user_id
+            )
+        )
+    except IntegrityError:
+        # The id was reused by a newer task; the restored one gets a new id
+        del values["id"]
+        task = db.session.execute(restore.values(values)).first()
+
+    record_task_change(user_id, None, task_facets(task))
+    return task.id
+
+
+def parse_before(value: str | None) -> tuple[datetime, int] | None:
+    """Parse an archive page cursor, "<completed_at>,<id>"; None if absent or invalid."""
+    try:
+        completed_at, _, task_id = (value or "").rpartition(",")
+        return datetime.fromisoformat(completed_at), int(task_id)
+    except ValueError:
+        return None
+
+
+@archive.route("/archive")
+@login_required
+def archived() -> Response:
+    """Archived tasks, newest completions first, one page at a time."""
+    limit = current_app.config.get("ARCHIVE_PAGE_SIZE", 50)
+    query = (
+        select(
+            ArchivedTask.id,
+            ArchivedTask.title,
+            ArchivedTask.priority,
+            ArchivedTask.due_date,
+            ArchivedTask.completed_at,
+            Category.name.label("category"),
+        )
+        .join(Category, ArchivedTask.category_id == Category.id)
+        .where(ArchivedTask.user_id == current_user.id)
+        .order_by(ArchivedTask.completed_at.desc(), ArchivedTask.id.desc())
+        .limit(limit + 1)
+    )
+    before = parse_before(request.args.get("before"))
+    if before is not None:
+        query = query.where(tuple_(ArchivedTask.completed_at, ArchivedTask.id) < before)
+
+    rows = db.session.execute(query).all()
+    older = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        older = f"{rows[-1].completed_at.isoformat()},{rows[-1].id}"
+
+    return render_template("archive.html", tasks=rows, older=older)
+
+
+@archive.route("/archive/<int:task_id>/restore", methods=["GET", "POST"])
+@login_required
+def restore(task_id: int) -> Response:
+    """Move an archived task back to the dashboard as incomplete."""
+    try:
+        restored_id = restore_task(task_id, current_user.id)
+        if restored_id is None:
+            db.session.rollback()
+            flash("Task not found or unauthorized", "error")
+            return redirect(url_for("archive.archived"))
+
+        db.session.commit()
+        publish_task("created", restored_id)
+        flash("Task restored from the archive and marked as incomplete.", "info")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        flash(f"Database error: {e}", "error")
+
+    return redirect(url_for("tasks.dashboard"))
+
+
+@click.command("archive-tasks")
+@click.option("--days", type=int, default=None, help="Archive tasks completed this many days ago (default: config).")
+@click.option("--batch-size", type=int, default=None, help="Tasks moved per transaction (default: config).")
+@with_appcontext
+def archive_tasks_command(days: int | None, batch_size: int | None) -> None:
+    """Move long-completed tasks from the tasks table to the archive."""
+    config = current_app.config
+    days = days if days is not None else config.get("ARCHIVE_AFTER_DAYS", 30)
+    batch_size = batch_size or config.get("ARCHIVE_BATCH_SIZE", 500)
+    archived_count = 0
+    for shard in shard_names():
+        with using_shard(shard):
+            archived_count += archive_completed(days, batch_size, echo=click.echo)
+    click.echo(f"Archived {archived_count} tasks completed more than {days} days ago.")
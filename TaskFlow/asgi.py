@@ -0,0 +1,28 @@
+"""
+Production ASGI entry point:
+Runs TaskFlow in async execution mode under an ASGI server such as Uvicorn.
+
+    uvicorn asgi:app
+"""
+
+import os
+from app import create_app
+from async_app import AsyncApp
+
+
+# Uvicorn reads --workers from WEB_CONCURRENCY too. The default event backend
+# only reaches live-update streams served by the same process, so with
+# several workers live updates are turned off unless a shared backend is set
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+overrides = {}
+if workers > 1 and os.environ.get("EVENT_BACKEND", "memory") == "memory":
+    overrides["EVENT_BACKEND"] = "none"
+
+flask_app = create_app(os.environ.get("TASKFLOW_CONFIG", "production"), overrides)
+if overrides:
+    flask_app.logger.warning(
+        "Live updates are off: EVENT_BACKEND=memory only reaches one of %d workers. "
+        "Set EVENT_BACKEND to a cross-process 'module:Class' backend to enable them.",
+        workers,
+    )
+app = AsyncApp(flask_app)
@@ -0,0 +1,257 @@
+"""
+Async execution mode:
+ASGI application that serves long-lived streaming routes (exports and the
+live events stream) natively on the event loop, and hands every other
+request to the Flask app in a bounded thread pool once its body has been
+received.
+
+Native routes bypass Flask's request hooks. They record their own request
+metrics; the rate limits only cover the auth routes, and shard routing is
+not needed because exports go through Flask when sharding is on.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from functools import partial
+from time import perf_counter
+from urllib.parse import parse_qs, quote
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+from flask_login import current_user
+from werkzeug.test import EnvironBuilder
+from async_db import async_db
+from events import KEEPALIVE, RESYNC, event_hub, format_event
+from export import export_filename, export_query, generate_csv, generate_ndjson
+from metrics import LATENCY_BUCKETS
+
+
+Scope = dict
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+async def buffer_body(receive: Receive, limit: int) -> Receive:
+    """
+    Read a request body of up to `limit` bytes on the event loop, so a slow
+    upload never holds a worker thread. Larger bodies stream through as-is.
+    """
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body") or size > limit:
+            break
+
+    async def replay() -> dict:
+        return messages.pop(0) if messages else await receive()
+
+    return replay
+
+
+class AsyncApp:
+    """ASGI front end for a TaskFlow Flask app."""
+
+    def __init__(self, flask_app: Flask) -> None:
+        self.flask_app = flask_app
+        self.body_limit = flask_app.config.get("ASGI_BODY_BUFFER_LIMIT", 1024 * 1024)
+        self.batch_size = flask_app.config.get("EXPORT_BATCH_SIZE", 500)
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config.get("ASGI_THREADS", 32))
+        async_db.init_app(flask_app)
+
+        # Native async routes (GET only)
+        self.routes: dict[str, Callable[[Scope, Receive, Send], Awaitable[None]]] = {
+            "/export/tasks.csv": self.export_csv,
+            "/export/tasks.ndjson": self.export_ndjson,
+            "/events": self.events,
+        }
+
+        # The async engine only reaches the main database; with sharding on,
+        # exports go through Flask, which routes them to the user's shard
+        if flask_app.config.get("SHARDS"):
+            del self.routes["/export/tasks.csv"], self.routes["/export/tasks.ndjson"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        if scope["type"] == "http":
+            handler = self.routes.get(scope["path"])
+            if handler and scope["method"] == "GET":
+                return await handler(scope, receive, send)
+            receive = await buffer_body(receive, self.body_limit)
+
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        """Acknowledge startup and dispose the async engine on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_db.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # Authentication
+
+    def current_user_id(self, scope: Scope) -> int | None:
+        """Resolve the logged-in user from the session cookie, as Flask-Login would."""
+        cookies = [value.decode("latin-1") for key, value in scope["headers"] if key == b"cookie"]
+        environ = EnvironBuilder(
+            path=scope["path"],
+            base_url=f"{scope.get('scheme', 'http')}://localhost",
+            headers={"Cookie": "; ".join(cookies)},
+        ).get_environ()
+        with self.flask_app.request_context(environ):
+            return current_user.id if current_user.is_authenticated else None
+
+    async def login_redirect(self, scope: Scope, send: Send, route: str, start: float) -> None:
+        """Send anonymous users to the login page, like login_required."""
+        location = f"/login?next={quote(scope['path'])}"
+        await send({
+            "type": "http.response.start",
+            "status": 302,
+            "headers": [(b"location", location.encode())],
+        })
+        self.record(route, 302, start)
+        await send({"type": "http.response.body", "body": b""})
+
+    def record(self, route: str, status: int, start: float) -> None:
+        """
+        Count a native request in the app's metrics. Like the Flask routes,
+        streamed responses are timed until their last chunk is sent.
+        """
+        metrics = self.flask_app.extensions.get("metrics")
+        if metrics is None:
+            return
+        labels = f'route="{route}",method="GET"'
+        metrics.observe("taskflow_request_duration_seconds", labels, perf_counter() - start, LATENCY_BUCKETS)
+        metrics.increment("taskflow_responses_total", f'{labels},status="{status}"')
+
+    # Routes
+
+    async def export_csv(self, scope: Scope, receive: Receive, send: Send) -> None:
+        header = "".join(generate_csv([]))
+        encoder = partial(generate_csv, header=False)
+        await self.stream_export(scope, send, encoder, header, "text/csv", "csv")
+
+    async def export_ndjson(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_export(scope, send, generate_ndjson, "", "application/x-ndjson", "ndjson")
+
+    async def stream_export(
+        self,
+        scope: Scope,
+        send: Send,
+        encoder: Callable[[list], Iterator[str]],
+        header: str,
+        mimetype: str,
+        extension: str,
+    ) -> None:
+        """
+        Stream an export over the async session. The event loop only waits on
+        the database and the client; row encoding runs in a worker thread.
+        """
+        start = perf_counter()
+        route = f"export.export_{extension}"
+
+        # Cookie decoding and a possible user lookup happen off the loop
+        user_id = await asyncio.to_thread(self.current_user_id, scope)
+        if user_id is None:
+            return await self.login_redirect(scope, send, route, start)
+
+        query_string = scope.get("query_string", b"").decode()
+        args = {key: values[0] for key, values in parse_qs(query_string).items()}
+        query = export_query(user_id, args)
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", f"{mimetype}; charset=utf-8".encode()),
+                (b"content-disposition", f"attachment; filename={export_filename(extension)}".encode()),
+            ],
+        })
+        if header:
+            await send({"type": "http.response.body", "body": header.encode(), "more_body": True})
+
+        async with async_db.session() as session:
+            result = await session.stream(query.execution_options(yield_per=self.batch_size))
+            async for partition in result.partitions():
+                chunk = await asyncio.to_thread(lambda rows=partition: "".join(encoder(rows)))
+                await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+
+        await send({"type": "http.response.body", "body": b""})
+        self.record(route, 200, start)
+
+    async def events(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Live events stream. An idle client costs a queue and a suspended
+        coroutine; events published from Flask threads are handed to the
+        loop thread-safely.
+        """
+        start = perf_counter()
+        user_id = await asyncio.to_thread(self.current_user_id, scope)
+        if user_id is None:
+            return await self.login_redirect(scope, send, "events.stream", start)
+
+        # Live updates are off; 204 tells EventSource to stop reconnecting
+        if not event_hub.enabled:
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            self.record("events.stream", 204, start)
+            return await send({"type": "http.response.body", "body": b""})
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[dict] = asyncio.Queue(event_hub.queue_size)
+
+        def offer(event: dict) -> None:
+            # A client this far behind gets a single resync instead
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                event = RESYNC
+            queue.put_nowait(event)
+
+        def deliver(event: dict) -> None:
+            loop.call_soon_threadsafe(offer, event)
+
+        async def disconnected() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True})
+
+        event_hub.backend.subscribe(user_id, deliver)
+        closed = asyncio.ensure_future(disconnected())
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, closed}, timeout=event_hub.keepalive, return_when=asyncio.FIRST_COMPLETED
+                )
+                if closed in done:
+                    getter.cancel()
+                    break
+                if getter in done:
+                    chunk = format_event(getter.result())
+                else:
+                    getter.cancel()
+                    chunk = KEEPALIVE
+                await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        finally:
+            event_hub.backend.unsubscribe(user_id, deliver)
+            closed.cancel()
+            self.record("events.stream", 200, start)
@@ -0,0 +1,63 @@
+"""
+Async database access:
+An asyncio SQLAlchemy engine and session factory for native async routes,
+pointed at the same database as the app's synchronous engine.
+"""
+
+from flask import Flask
+from sqlalchemy import URL, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from database import sqlite_pragma_listener
+from models import db
+
+
+# Async driver for each synchronous dialect
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_url(url: URL) -> URL:
+    """Swap a database URL's driver for its asyncio counterpart."""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for '{backend}' databases.")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncDatabase:
+    """Holds the async engine and session factory for one app."""
+
+    def __init__(self) -> None:
+        self.engine: AsyncEngine | None = None
+        self.sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+    def init_app(self, app: Flask) -> None:
+        """Create the async engine from the app's resolved database URL."""
+        with app.app_context():
+            url = db.engine.url
+
+        self.engine = create_async_engine(
+            async_url(url), **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        )
+        pragmas = app.config.get("SQLITE_PRAGMAS", {})
+        if url.get_backend_name() == "sqlite" and pragmas:
+            event.listen(self.engine.sync_engine, "connect", sqlite_pragma_listener(pragmas))
+
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        app.extensions["async_db"] = self
+
+    def session(self) -> AsyncSession:
+        """Open a new async session; use it as an async context manager."""
+        return self.sessionmaker()
+
+    async def dispose(self) -> None:
+        """Close pooled connections."""
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
+# Shared per-process async database
+async_db = AsyncDatabase()
@@ -3,10 +3,13 @@ Authentication routes and logic:
 Handles user registration, login, logout, and session management.
 """
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from models import db, User
+from ratelimit import rate_limiter
+from shards import assign_shard
 from werkzeug.wrappers import Response
+import math
 import re
 
 
@@ -34,6 +37,15 @@ def validate_password(password: str) -> tuple[bool, str]:
     return True, "Password is strong enough."
 
 
+def too_many_attempts(template: str, wait: float) -> Response:
+    """Turn away a throttled request with 429 and a Retry-After header."""
+    seconds = math.ceil(wait)
+    flash(f"Too many attempts. Please try again in {seconds} seconds.", "error")
+    return Response(
+        render_template(template), status=429, headers={"Retry-After": str(seconds)}
+    )
+
+
 @auth.route("/register", methods=["GET", "POST"])
 def register() -> Response:
     """Handles user registration."""
@@ -45,9 +57,19 @@ def register() -> Response:
         return render_template("register.html")
 
     if request.method == "POST":
+        # Throttle by address before reading the form
+        wait = rate_limiter.hit("register_ip", request.remote_addr)
+        if wait:
+            return too_many_attempts("register.html", wait)
+
         # Get form data
         username: str = request.form.get("username", "").strip()
         email: str = request.form.get("email", "").strip().lower()
+
+        # Throttle by account before the uniqueness queries and hashing
+        wait = rate_limiter.hit("register_account", email)
+        if wait:
+            return too_many_attempts("register.html", wait)
         first_name: str = request.form.get("first_name", "").strip()
         last_name: str = request.form.get("last_name", "").strip()
         password: str = request.form.get("password", "")
@@ -102,6 +124,9 @@ def register() -> Response:
             user.set_password(password)
 
             db.session.add(user)
+            db.session.flush()
+            # With sharding on, new users go to the least populated shard
+            assign_shard(user.id)
             db.session.commit()
 
             login_user(user, remember=True)
@@ -111,7 +136,7 @@ def register() -> Response:
         except Exception as e:
             db.session.rollback()
             flash("An error occured during registration. Please try again.", "error")
-            print(f"Registration error: {e}")
+            current_app.logger.error("Registration error: %s", e)
 
         return render_template("register.html")
 
@@ -126,6 +151,11 @@ def login() -> Response:
         return render_template("login.html")
 
     if request.method == "POST":
+        # Throttle by address before reading the form
+        wait = rate_limiter.hit("login_ip", request.remote_addr)
+        if wait:
+            return too_many_attempts("login.html", wait)
+
         username_or_email: str = request.form.get("username_or_email", "").strip()
         password: str = request.form.get("password", "")
         remember_me: bool = bool(request.form.get("remember_me", False))
@@ -140,6 +170,13 @@ def login() -> Response:
         else:
             user = User.query.filter_by(username=username_or_email).first()
 
+        # Throttle by account before the password check; keying on the user id
+        # gives the username and the email one shared budget
+        account = f"user:{user.id}" if user else f"unknown:{username_or_email.lower()}"
+        wait = rate_limiter.hit("login_account", account)
+        if wait:
+            return too_many_attempts("login.html", wait)
+
         # Check if user exists and password is correct
         if user and user.check_password(password):
             # Login successful
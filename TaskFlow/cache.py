@@ -0,0 +1,156 @@
+"""
+User caching:
+Per-process TTL/LRU caches: the shared TTLCache, and lightweight user
+records for the Flask-Login loader built on it.
+"""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from threading import Lock
+from time import monotonic
+from typing import Any
+from flask import Flask
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from models import db, User
+
+
+class CachedUser(UserMixin):
+    """Detached, read-only snapshot of a user row used as `current_user`."""
+
+    __slots__ = ("id", "username", "email", "first_name", "last_name")
+
+    def __init__(self, user: User) -> None:
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+
+    def get_full_name(self) -> str:
+        """Return the user's full name."""
+        return f"{self.first_name} {self.last_name}"
+
+    def __repr__(self) -> str:
+        """Cached user representation for debugging."""
+        return f"<CachedUser({self.username}, {self.email})>"
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a time-to-live for per-user entries.
+    Subclasses load entries on a miss and drop them when this process
+    changes the underlying rows; other processes converge once the TTL expires.
+    """
+
+    # init_app() reads <prefix>_SIZE and <prefix>_TTL and registers the
+    # cache as the lowercased prefix in app.extensions
+    config_prefix = ""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, Hashable, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """Read cache limits from the app config."""
+        self.max_size = app.config.get(f"{self.config_prefix}_SIZE", self.max_size)
+        self.ttl = app.config.get(f"{self.config_prefix}_TTL", self.ttl)
+        app.extensions[self.config_prefix.lower()] = self
+
+    def lookup(self, key: int, now: float, tag: Hashable = None) -> Any:
+        """
+        Return the live entry for `key` if it was stored with `tag`, else None.
+        Counts the hit or miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now and entry[1] == tag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def store(self, key: int, value: Any, now: float | None = None, tag: Hashable = None) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+        if self.max_size <= 0:
+            return
+        expires = (now if now is not None else monotonic()) + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: int) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class UserCache(TTLCache):
+    """
+    User records for the Flask-Login loader. Entries are dropped once a
+    change to the underlying user row commits in this process.
+    """
+
+    config_prefix = "USER_CACHE"
+
+    def get(self, user_id: int) -> CachedUser | None:
+        """Return a cached user, loading it from the database on a miss."""
+        now = monotonic()
+        record = self.lookup(user_id, now)
+        if record is not None:
+            return record
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+
+        record = CachedUser(user)
+        self.put(record, now)
+        return record
+
+    def put(self, record: CachedUser, now: float | None = None) -> None:
+        """Store a record, evicting the least recently used entry if full."""
+        self.store(record.id, record, now)
+
+
+# Shared per-process cache
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target: User) -> None:
+    """Remember users changed by a flush until the transaction commits."""
+    object_session(target).info.setdefault("changed_users", set()).add(target.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_changed_users(session) -> None:
+    """
+    Invalidate changed users once the change is committed. Invalidating at
+    flush time would let a concurrent miss re-cache the old row for the TTL.
+    A rolled back change leaves its ids behind, which only costs a miss.
+    """
+    for user_id in session.info.pop("changed_users", ()):
+        user_cache.invalidate(user_id)
+
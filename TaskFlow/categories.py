@@ -0,0 +1,48 @@
+"""
+Task categories:
+Resolves category names to the owner's rows in the categories table and
+lists them with their maintained task counts.
+"""
+
+from sqlalchemy import Row, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Category
+
+
+# Category given to tasks that don't name one
+DEFAULT_CATEGORY = "general"
+
+
+def normalize_name(name: str | None) -> str:
+    """Canonical form of a category name."""
+    return (name or "").strip().lower()[:50] or DEFAULT_CATEGORY
+
+
+def category_id_for(user_id: int, name: str | None) -> int:
+    """
+    Return the id of the user's category called `name`, creating it if needed.
+    Runs inside the caller's transaction.
+    """
+    name = normalize_name(name)
+    query = select(Category.id).where(Category.user_id == user_id, Category.name == name)
+    category_id = db.session.scalar(query)
+    if category_id is not None:
+        return category_id
+
+    # Another request may create the same category first; the unique constraint decides
+    try:
+        with db.session.begin_nested():
+            category = Category(user_id=user_id, name=name, task_count=0)
+            db.session.add(category)
+        return category.id
+    except IntegrityError:
+        return db.session.scalar(query)
+
+
+def user_categories(user_id: int) -> list[Row]:
+    """The user's non-empty categories as (id, name, task_count), by name."""
+    return db.session.execute(
+        select(Category.id, Category.name, Category.task_count)
+        .where(Category.user_id == user_id, Category.task_count > 0)
+        .order_by(Category.name)
+    ).all()
@@ -0,0 +1,179 @@
+"""
+Application configuration:
+Settings profiles selected by name or by the TASKFLOW_CONFIG environment variable.
+"""
+
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_shards(name: str) -> dict[str, str]:
+    """Read "name=url,name=url" shard settings from the environment."""
+    shards = {}
+    for item in filter(None, os.environ.get(name, "").split(",")):
+        shard, _, url = item.partition("=")
+        shards[shard.strip()] = url.strip()
+    return shards
+
+
+class Config:
+    """Base settings shared by every profile."""
+
+    SECRET_KEY = os.environ.get("SECRET_KEY")
+
+    # Database URI can point at any SQLAlchemy-supported server
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///taskflow.db")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS: dict[str, int | bool] = {}
+
+    # Optional sharding: "name=url,name=url" puts each user's tasks in one of
+    # these databases; the main one keeps users and the shard directory
+    SHARDS = env_shards("SHARDS")
+    SQLALCHEMY_BINDS = dict(SHARDS)
+    SHARD_DIRECTORY_SIZE = 4096
+    SHARD_DIRECTORY_TTL = 30
+
+    # PRAGMAs run on every new SQLite connection (ignored for other databases)
+    SQLITE_PRAGMAS: dict[str, str | int] = {
+        "busy_timeout": env_int("SQLITE_BUSY_TIMEOUT", 5000),
+    }
+
+    # Startup schema version check: "warn", "strict" or "off"
+    SCHEMA_CHECK = os.environ.get("SCHEMA_CHECK", "warn")
+
+    # Flask-Login user cache
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL = 300
+
+    # Compiled template cache (defaults to <instance>/jinja_cache) and
+    # the size of chunks sent when streaming pages
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR")
+    STREAM_BUFFER_SIZE = 8192
+
+    # Recurring tasks: days around today expanded on the dashboard, and the
+    # per-user expansion cache
+    RECURRENCE_LOOKBACK_DAYS = 7
+    RECURRENCE_WINDOW_DAYS = 14
+    RECURRENCE_CACHE_SIZE = 1024
+    RECURRENCE_CACHE_TTL = 300
+
+    # Live updates: "memory" (this process only), "none" (off) or a
+    # "module:Class" backend, events buffered per stream, and seconds between keepalives
+    EVENT_BACKEND = os.environ.get("EVENT_BACKEND", "memory")
+    EVENT_QUEUE_SIZE = 100
+    EVENT_KEEPALIVE_SECONDS = 15
+
+    # Threaded streams each hold a worker thread: at most this many per
+    # process (gunicorn.conf.py adds a thread for each), each closed after
+    # this many seconds so browsers reconnect and slots turn over
+    EVENT_MAX_STREAMS = env_int("EVENT_MAX_STREAMS", 16)
+    EVENT_STREAM_SECONDS = env_int("EVENT_STREAM_SECONDS", 300)
+
+    # Delta sync API: page sizes, how far the final cursor trails the clock,
+    # and how long delete tombstones are kept
+    SYNC_PAGE_SIZE = 500
+    SYNC_MAX_PAGE_SIZE = 1000
+    SYNC_CLOCK_SKEW_SECONDS = 2
+    SYNC_TOMBSTONE_RETENTION_DAYS = env_int("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+
+    # Archival: completed tasks older than this move to archived_tasks
+    # (`flask archive-tasks`), in batches of ARCHIVE_BATCH_SIZE per transaction
+    ARCHIVE_AFTER_DAYS = env_int("ARCHIVE_AFTER_DAYS", 30)
+    ARCHIVE_BATCH_SIZE = 500
+    ARCHIVE_PAGE_SIZE = 50
+
+    # Auth rate limits as (requests, seconds), refilled continuously, and the
+    # bucket store: "memory" (this process only) or a "module:Class" path
+    RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "1") == "1"
+    RATELIMIT_STORE = os.environ.get("RATELIMIT_STORE", "memory")
+    RATELIMIT_MAX_KEYS = 100_000
+    RATELIMIT_LOGIN_IP = (20, 60)
+    RATELIMIT_LOGIN_ACCOUNT = (10, 300)
+    RATELIMIT_REGISTER_IP = (10, 3600)
+    RATELIMIT_REGISTER_ACCOUNT = (5, 3600)
+
+    # Proxies in front of the app whose X-Forwarded-For/-Proto are trusted,
+    # so rate limits see client addresses (0 when serving directly)
+    PROXY_FIX_HOPS = env_int("PROXY_FIX_HOPS", 0)
+
+    # Rows fetched per round trip when streaming exports
+    EXPORT_BATCH_SIZE = 500
+
+    # Rows per bulk insert and commit when importing ToDo CSV files
+    IMPORT_BATCH_SIZE = 1000
+
+    # Instrumentation: queries slower than this are logged; token guards /metrics
+    # (required to start when METRICS_REQUIRE_TOKEN is set)
+    SLOW_QUERY_THRESHOLD_MS = env_int("SLOW_QUERY_THRESHOLD_MS", 100)
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    METRICS_REQUIRE_TOKEN = False
+
+    # Async mode (asgi.py): Flask worker threads and request bodies buffered on the loop
+    ASGI_THREADS = env_int("ASGI_THREADS", 32)
+    ASGI_BODY_BUFFER_LIMIT = env_int("ASGI_BODY_BUFFER_LIMIT", 1024 * 1024)
+
+    # Due-date reminder scheduler
+    REMINDER_SCHEDULER_ENABLED = os.environ.get("REMINDER_SCHEDULER_ENABLED") == "1"
+    REMINDER_HORIZON_HOURS = 24
+    REMINDER_CATCHUP_HOURS = 24
+    REMINDER_MAX_SLEEP = 300
+
+
+class DevelopmentConfig(Config):
+    """Local development with default engine settings."""
+
+    DEBUG = True
+    SECRET_KEY = os.environ.get("SECRET_KEY", "dev")
+
+
+class ProductionConfig(Config):
+    """Tuned engine for concurrent readers and writers."""
+
+    DEBUG = False
+
+    # /metrics exposes route and query details, so it is never served unauthenticated
+    METRICS_REQUIRE_TOKEN = True
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": env_int("DB_POOL_SIZE", 10),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+    # WAL lets readers proceed while a writer commits
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": env_int("SQLITE_BUSY_TIMEOUT", 5000),
+        "cache_size": -env_int("SQLITE_CACHE_KB", 65536),
+        "mmap_size": env_int("SQLITE_MMAP_SIZE", 268435456),
+        "temp_store": "MEMORY",
+    }
+
+
+class TestingConfig(Config):
+    """Test suite: throwaway databases, no background work or rate limits."""
+
+    TESTING = True
+    SECRET_KEY = "test"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SHARDS: dict[str, str] = {}
+    SQLALCHEMY_BINDS: dict[str, str] = {}
+    SCHEMA_CHECK = "off"
+    REMINDER_SCHEDULER_ENABLED = False
+    RATELIMIT_ENABLED = False
+
+
+config: dict[str, type[Config]] = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+    "default": DevelopmentConfig,
+}
@@ -0,0 +1,80 @@
+import pytest
+from app import create_app
+from cache import user_cache
+from migrations import upgrade
+from models import db, Task
+from recurrence import recurrence_cache
+from shards import shard_directory
+
+
+def make_app(tmp_path, version: int | None = None, **overrides):
+    """Build a testing app on fresh SQLite files, migrated to `version` (default: latest)."""
+    # Per-process caches outlive apps, and user ids repeat across test databases
+    user_cache.clear()
+    recurrence_cache.clear()
+    shard_directory.clear()
+
+    app = create_app("testing", {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'main.db'}",
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja_cache"),
+        **overrides,
+    })
+    with app.app_context():
+        for engine in db.engines.values():
+            upgrade(version, engine=engine)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Unsharded app with an empty database."""
+    app = make_app(tmp_path)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def sharded_app(tmp_path):
+    """App with two shard databases, "a" and "b"."""
+    shards = {name: f"sqlite:///{tmp_path / name}.db" for name in ("a", "b")}
+    app = make_app(tmp_path, SHARDS=shards, SQLALCHEMY_BINDS=dict(shards), SHARD_DIRECTORY_TTL=0)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """Test client signed in as a freshly registered user."""
+    client = app.test_client()
+    register(client, "alice")
+    return client
+
+
+def register(client, username: str, password: str = "abc123"):
+    """Register (and thereby sign in) a user."""
+    return client.post("/register", data={
+        "username": username,
+        "email": f"{username}@example.com",
+        "first_name": username.title(),
+        "last_name": "Tester",
+        "password": password,
+    })
+
+
+def create_task(client, title: str = "Task", **fields):
+    """Create a task through the form and return its id."""
+    data = {
+        "title": title,
+        "description": f"{title} description",
+        "priority": "medium",
+        "category": "general",
+        "due_date": "2099-01-01T10:00",
+        **fields,
+    }
+    client.post("/create-task", data=data)
+    with client.application.app_context():
+        return db.session.scalar(db.select(Task.id).where(Task.title == title).order_by(Task.id.desc()))
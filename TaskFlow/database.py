@@ -1,21 +1,48 @@
 """
 Database initialization and configuration:
-Handles setup, creation, initial data seed.
+Handles setup, startup schema check, initial data seed.
 """
 
-from flask import Flask
+import click
+from collections.abc import Callable
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from categories import category_id_for
 from models import db, User, Task
+from stats import record_task_change, task_facets
+from migrations import check_schema
 from datetime import datetime, timedelta
 
 
-def init_database(app: Flask) -> None:
-    """Initialize the database with the Flask app."""
-    # Create all tables
+def sqlite_pragma_listener(pragmas: dict) -> Callable:
+    """Build a connect-event handler that runs the given PRAGMAs."""
+    def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_sqlite_pragmas
+
+
+def configure_engine(app: Flask) -> None:
+    """Apply SQLITE_PRAGMAS to every new connection of the app's engines."""
+    pragmas: dict = app.config.get("SQLITE_PRAGMAS", {})
     with app.app_context():
-        db.create_all()
-        # Check if need to create demo data
-        if User.query.count() == 0:
-            create_demo_data()
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        if engine.dialect.name == "sqlite" and pragmas:
+            event.listen(engine, "connect", sqlite_pragma_listener(pragmas))
+
+
+def init_database(app: Flask) -> None:
+    """
+    Verify the database schema on startup.
+    Schema changes and demo data are applied by the db-upgrade and seed-demo
+    commands, so booting a worker costs a single version query.
+    """
+    check_schema(app)
 
 
 def create_demo_data() -> None:
@@ -70,20 +97,32 @@ def create_demo_data() -> None:
                 title=task_data["title"],
                 description=task_data["description"],
                 priority=task_data["priority"],
-                category=task_data["category"],
+                category_id=category_id_for(demo_user.id, task_data["category"]),
                 user_id=demo_user.id,
                 due_date=task_data.get("due_date"),
                 completed=task_data.get("completed", False),
             )
 
             db.session.add(task)
+            record_task_change(demo_user.id, None, task_facets(task))
 
         # Commit all changes to the db
         db.session.commit()
-        print("Demo data created successfully!")
+        current_app.logger.info("Demo data created successfully!")
 
     except Exception as e:
         # If anything goes wrong, rollback the transaction
         db.session.rollback()
-        print(f"Error creating demo data: {e}")
+        current_app.logger.error("Error creating demo data: %s", e)
+
+
+@click.command("seed-demo")
+@with_appcontext
+def seed_demo_command() -> None:
+    """Create the demo account and sample tasks if missing."""
+    if User.query.filter_by(username="demo_user").first():
+        click.echo("Demo user already exists.")
+        return
+    create_demo_data()
+    click.echo("Demo data created.")
 
@@ -0,0 +1,237 @@
+"""
+Live task updates:
+Publish/subscribe hub that carries task events to per-user Server-Sent
+Events streams. The backend is swappable; the default one delivers events
+to subscribers in the same process.
+
+A threaded stream holds a worker thread while it is open, so each process
+serves at most EVENT_MAX_STREAMS of them, for EVENT_STREAM_SECONDS each.
+The async entry point serves streams on the event loop without these limits.
+"""
+
+import json
+import random
+from collections.abc import Callable, Iterator
+from queue import Empty, Full, Queue
+from threading import Lock
+from time import monotonic
+from flask import Blueprint, Flask
+from flask_login import login_required, current_user
+from werkzeug.utils import import_string
+from werkzeug.wrappers import Response
+
+
+events = Blueprint("events", __name__)
+
+# An event is {"type": "task.updated", "data": {...}}
+Event = dict
+Callback = Callable[[Event], None]
+
+# Sent to a subscriber that fell too far behind; the client reloads instead
+RESYNC = {"type": "resync", "data": {}}
+
+
+class MemoryBackend:
+    """Delivers events to subscribers in this process only."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[int, set[Callback]] = {}
+        self._lock = Lock()
+
+    def publish(self, user_id: int, event: Event) -> None:
+        """Hand an event to every subscriber of a user."""
+        with self._lock:
+            callbacks = list(self._subscribers.get(user_id, ()))
+        for callback in callbacks:
+            callback(event)
+
+    def subscribe(self, user_id: int, callback: Callback) -> None:
+        """Register a callback for a user's events."""
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(callback)
+
+    def unsubscribe(self, user_id: int, callback: Callback) -> None:
+        """Remove a callback registered with subscribe()."""
+        with self._lock:
+            callbacks = self._subscribers.get(user_id)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        """True if anyone is listening; lets publishers skip building events."""
+        with self._lock:
+            return user_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        """Number of open subscriptions across all users."""
+        with self._lock:
+            return sum(len(callbacks) for callbacks in self._subscribers.values())
+
+
+class NullBackend:
+    """Live updates turned off: nothing is delivered and streams are refused."""
+
+    def publish(self, user_id: int, event: Event) -> None:
+        """Drop the event."""
+
+    def subscribe(self, user_id: int, callback: Callback) -> None:
+        """Ignore the callback."""
+
+    def unsubscribe(self, user_id: int, callback: Callback) -> None:
+        """Nothing to remove."""
+
+    def has_subscribers(self, user_id: int) -> bool:
+        """Nobody ever listens."""
+        return False
+
+
+# Backends selectable by name; EVENT_BACKEND may also be a "module:Class" path
+BACKENDS = {"memory": MemoryBackend, "none": NullBackend}
+
+
+class Subscription:
+    """Bounded queue of one stream's pending events, for blocking readers."""
+
+    def __init__(self, hub: "EventHub", user_id: int) -> None:
+        self.hub = hub
+        self.user_id = user_id
+        self.closed = False
+        self.queue: Queue[Event] = Queue(hub.queue_size)
+        hub.backend.subscribe(user_id, self.put)
+
+    def put(self, event: Event) -> None:
+        """Queue an event; a full queue is replaced by a single resync."""
+        try:
+            self.queue.put_nowait(event)
+        except Full:
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait(RESYNC)
+
+    def get(self, timeout: float) -> Event | None:
+        """Wait up to `timeout` seconds for the next event."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def close(self) -> None:
+        """Stop receiving events and free the stream slot; safe to call twice."""
+        if self.closed:
+            return
+        self.closed = True
+        self.hub.backend.unsubscribe(self.user_id, self.put)
+        self.hub.release()
+
+
+class EventHub:
+    """Routes published task events to the owner's open streams."""
+
+    def __init__(self) -> None:
+        self.backend = MemoryBackend()
+        self.queue_size = 100
+        self.keepalive = 15.0
+        self.max_streams = 16
+        self.stream_seconds = 300.0
+        self.streams = 0
+        self._lock = Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """Create the configured backend and read stream settings."""
+        backend = app.config.get("EVENT_BACKEND", "memory")
+        self.backend = (BACKENDS.get(backend) or import_string(backend))()
+        self.queue_size = app.config.get("EVENT_QUEUE_SIZE", self.queue_size)
+        self.keepalive = app.config.get("EVENT_KEEPALIVE_SECONDS", self.keepalive)
+        self.max_streams = app.config.get("EVENT_MAX_STREAMS", self.max_streams)
+        self.stream_seconds = app.config.get("EVENT_STREAM_SECONDS", self.stream_seconds)
+        app.extensions["event_hub"] = self
+
+    @property
+    def enabled(self) -> bool:
+        """False when live updates are turned off (EVENT_BACKEND = "none")."""
+        return not isinstance(self.backend, NullBackend)
+
+    def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        """Send an event to a user's streams."""
+        self.backend.publish(user_id, {"type": event_type, "data": data})
+
+    def wanted(self, user_id: int) -> bool:
+        """True if publishing for this user could reach a stream."""
+        return self.backend.has_subscribers(user_id)
+
+    def subscribe(self, user_id: int) -> Subscription | None:
+        """
+        Open a blocking subscription, or return None if this process already
+        serves EVENT_MAX_STREAMS streams (0 means no limit). close() it when the stream ends.
+        """
+        with self._lock:
+            if self.max_streams and self.streams >= self.max_streams:
+                return None
+            self.streams += 1
+        return Subscription(self, user_id)
+
+    def release(self) -> None:
+        """Free the slot of a closed subscription."""
+        with self._lock:
+            self.streams -= 1
+
+
+# Shared per-process hub
+event_hub = EventHub()
+
+
+def format_event(event: Event) -> str:
+    """Encode an event in the Server-Sent Events wire format."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+# Comment line that keeps idle connections and proxies from timing out
+KEEPALIVE = ": keepalive\n\n"
+
+
+def stream_events(subscription: Subscription, keepalive: float, duration: float) -> Iterator[str]:
+    """
+    Yield a subscription's events as SSE, with keepalives while idle.
+    The stream ends after `duration` seconds; browsers reconnect on their own.
+    """
+    deadline = monotonic() + duration
+    try:
+        yield "retry: 5000\n\n"
+        while (remaining := deadline - monotonic()) > 0:
+            event = subscription.get(min(keepalive, remaining))
+            yield KEEPALIVE if event is None else format_event(event)
+    finally:
+        subscription.close()
+
+
+@events.route("/events")
+@login_required
+def stream() -> Response:
+    """Server-Sent Events stream of the current user's task changes."""
+    # 204 tells EventSource to stop reconnecting
+    if not event_hub.enabled:
+        return Response(status=204)
+
+    # Every slot is in use. EventSource gives up on any error status, so
+    # answer with an empty stream whose retry hint brings the browser back
+    # once slots have turned over, spread out so clients don't return at once
+    subscription = event_hub.subscribe(current_user.id)
+    if subscription is None:
+        delay = random.uniform(event_hub.keepalive, max(event_hub.keepalive, event_hub.stream_seconds))
+        return Response(
+            f"retry: {round(delay * 1000)}\n\n",
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    # No app context is kept for the stream, so it holds no database connection
+    response = Response(
+        stream_events(subscription, event_hub.keepalive, event_hub.stream_seconds),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # A client that leaves before the first chunk never starts the generator
+    response.call_on_close(subscription.close)
+    return response
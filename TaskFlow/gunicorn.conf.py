@@ -0,0 +1,63 @@
+"""
+Gunicorn settings for TaskFlow:
+Pre-fork workers with a thread pool each, all tunable from the environment.
+Send SIGHUP to the master process for a graceful reload.
+"""
+
+import multiprocessing
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = os.environ.get("TASKFLOW_BIND", "0.0.0.0:8000")
+
+# One process per core (plus headroom), each serving requests from a thread pool
+workers = env_int("TASKFLOW_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+worker_class = "gthread"
+
+# The default event backend only reaches live-update streams held by the
+# same worker, so with several workers live updates are turned off unless
+# EVENT_BACKEND names a cross-process "module:Class" backend
+event_backend = os.environ.get("EVENT_BACKEND", "memory")
+raw_env = []
+if workers > 1 and event_backend == "memory":
+    event_backend = "none"
+    raw_env.append("EVENT_BACKEND=none")
+
+# Request threads, plus one per live-update stream a worker may hold
+# (EVENT_MAX_STREAMS, same default as config.py)
+threads = env_int("TASKFLOW_THREADS", 4)
+if event_backend != "none":
+    threads += env_int("EVENT_MAX_STREAMS", 16)
+
+# Keep-alive and timeouts in seconds
+keepalive = env_int("TASKFLOW_KEEPALIVE", 5)
+timeout = env_int("TASKFLOW_TIMEOUT", 30)
+graceful_timeout = env_int("TASKFLOW_GRACEFUL_TIMEOUT", 30)
+
+# Recycle workers after this many requests; jitter avoids restarting them all at once
+max_requests = env_int("TASKFLOW_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("TASKFLOW_MAX_REQUESTS_JITTER", 100)
+
+# Each worker builds its own app and engine after fork, so no database
+# connection is ever shared between processes
+preload_app = False
+
+accesslog = os.environ.get("TASKFLOW_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("TASKFLOW_LOG_LEVEL", "info")
+
+
+def on_starting(server) -> None:
+    """Say why live updates are off when the event backend was switched."""
+    if raw_env:
+        server.log.warning(
+            "Live updates are off: EVENT_BACKEND=memory only reaches one of %d workers. "
+            "Set EVENT_BACKEND to a cross-process 'module:Class' backend to enable them.",
+            workers,
+        )
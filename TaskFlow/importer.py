@@ -0,0 +1,200 @@
+"""
+ToDo CSV importer:
+Streams tasks.csv files from the ToDo CLI into TaskFlow in bulk batches.
+"""
+
+import click
+import csv
+import io
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from typing import TextIO
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask.cli import with_appcontext
+from flask_login import login_required, current_user
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.wrappers import Response
+from categories import DEFAULT_CATEGORY, category_id_for
+from models import db, make_excerpt, Task, User
+from shards import locate, using_shard
+from stats import apply_deltas
+
+
+importer = Blueprint("importer", __name__)
+
+# ToDo priorities mapped onto TaskFlow's
+PRIORITY_MAP = {"High": "high", "Medium": "medium", "Low": "low"}
+
+# Keep at most this many error messages per import
+MAX_ERRORS = 50
+
+
+class ImportResult:
+    """Running totals for an import."""
+
+    def __init__(self) -> None:
+        self.imported = 0
+        self.skipped = 0
+        self.errors: list[str] = []
+
+    def add_error(self, line: int, message: str) -> None:
+        """Count a rejected row and remember why."""
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+
+def parse_todo_row(
+    row: dict[str, str], user_id: int, category_id: int
+) -> tuple[dict | None, str | None]:
+    """Convert one ToDo CSV row into Task column values, or return an error."""
+    description = (row.get("description") or "").strip()
+    if not description:
+        return None, "Missing description."
+    if len(description) > 1000:
+        return None, "Description must be under 1000 characters long."
+
+    priority = PRIORITY_MAP.get((row.get("priority") or "").strip())
+    if priority is None:
+        return None, f"Invalid priority '{row.get('priority')}'."
+
+    try:
+        created = datetime.strptime((row.get("created") or "").strip(), "%Y-%m-%d")
+    except ValueError:
+        return None, f"Invalid created date '{row.get('created')}'."
+
+    completed = (row.get("completed") or "").strip().lower() == "true"
+
+    return {
+        "title": description[:200],
+        "description": description,
+        "excerpt": make_excerpt(description),
+        "priority": priority,
+        "category_id": category_id,
+        "completed": completed,
+        # ToDo doesn't record completion time, so use the creation date
+        "completed_at": created if completed else None,
+        "created_at": created,
+        # The import is the change syncing clients need to see
+        "updated_at": datetime.now(),
+        "user_id": user_id,
+    }, None
+
+
+def flush_batch(batch: list[dict], user_id: int) -> None:
+    """Bulk insert a batch, update stats counters and commit."""
+    db.session.execute(insert(Task), batch)
+
+    deltas: Counter = Counter()
+    for values in batch:
+        deltas[("status", "completed" if values["completed"] else "pending")] += 1
+        deltas[("priority", values["priority"])] += 1
+        deltas[("category", values["category_id"])] += 1
+    apply_deltas(user_id, deltas)
+
+    db.session.commit()
+
+
+def import_todo_csv(
+    stream: TextIO,
+    user_id: int,
+    batch_size: int = 1000,
+    progress: Callable[[ImportResult], None] | None = None,
+) -> ImportResult:
+    """
+    Import a ToDo tasks.csv stream for a user.
+    Rows are validated as they are read and inserted with one executemany
+    per batch, committed every `batch_size` rows.
+    """
+    result = ImportResult()
+    batch: list[dict] = []
+    reader = csv.DictReader(stream)
+
+    missing = {"description", "priority", "created", "completed"} - set(reader.fieldnames or [])
+    if missing:
+        result.add_error(1, f"Missing columns: {', '.join(sorted(missing))}.")
+        return result
+
+    try:
+        # ToDo has no categories; everything lands in the default one
+        category_id = category_id_for(user_id, DEFAULT_CATEGORY)
+        for row in reader:
+            values, error = parse_todo_row(row, user_id, category_id)
+            if error:
+                result.add_error(reader.line_num, error)
+                continue
+
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush_batch(batch, user_id)
+                result.imported += len(batch)
+                batch = []
+                if progress:
+                    progress(result)
+
+        if batch:
+            flush_batch(batch, user_id)
+            result.imported += len(batch)
+            if progress:
+                progress(result)
+    except (SQLAlchemyError, csv.Error, UnicodeDecodeError):
+        db.session.rollback()
+        raise
+
+    return result
+
+
+@importer.route("/import-tasks", methods=["GET", "POST"])
+@login_required
+def import_tasks() -> Response:
+    """Upload a ToDo tasks.csv file and import it into the current account."""
+    if request.method == "GET":
+        return render_template("import_tasks.html")
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Please choose a CSV file to import.", "error")
+        return redirect(url_for("importer.import_tasks"))
+
+    # Decode the upload lazily so it is never read into memory in full
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    try:
+        result = import_todo_csv(
+            stream,
+            current_user.id,
+            batch_size=current_app.config.get("IMPORT_BATCH_SIZE", 1000),
+        )
+    except (SQLAlchemyError, csv.Error, UnicodeDecodeError) as e:
+        flash(f"Import failed: {e}", "error")
+        return redirect(url_for("importer.import_tasks"))
+
+    for error in result.errors:
+        flash(error, "warning")
+    flash(f"Imported {result.imported} tasks, skipped {result.skipped}.", "success")
+    return redirect(url_for("tasks.dashboard"))
+
+
+@click.command("import-todo")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="TaskFlow username to import into.")
+@click.option("--batch-size", type=int, default=None, help="Rows per commit.")
+@with_appcontext
+def import_todo_command(path: str, username: str, batch_size: int | None) -> None:
+    """Import a ToDo tasks.csv file into a TaskFlow account."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named '{username}'.")
+
+    def report(result: ImportResult) -> None:
+        click.echo(f"  {result.imported} imported, {result.skipped} skipped")
+
+    batch_size = batch_size or current_app.config.get("IMPORT_BATCH_SIZE", 1000)
+    user_id = user.id
+    with open(path, encoding="utf-8-sig", newline="") as file, using_shard(locate(user_id)):
+        result = import_todo_csv(file, user_id, batch_size=batch_size, progress=report)
+
+    for error in result.errors:
+        click.echo(error, err=True)
+    click.echo(f"Done: {result.imported} imported, {result.skipped} skipped.")
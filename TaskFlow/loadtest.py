@@ -0,0 +1,191 @@
+"""
+Load-test harness:
+Replays a weighted mix of TaskFlow traffic against the app factory from
+several threads and reports throughput and latency percentiles per route.
+"""
+
+import click
+import random
+import re
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+from time import perf_counter
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from models import db, User, Task
+
+
+# Default traffic mix: action -> weight
+DEFAULT_MIX = {"dashboard": 50, "create": 10, "edit": 10, "toggle": 25, "login": 5}
+
+# Hidden fields of the edit form that the optimistic-concurrency check needs
+HIDDEN_INPUT = re.compile(r'<input type="hidden" name="(\w+)" value="([^"]*)">')
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse 'dashboard=50,create=10' into a weight mapping."""
+    mix = {}
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        if action.strip() not in DEFAULT_MIX:
+            raise click.BadParameter(f"Unknown action '{action}'.")
+        mix[action.strip()] = int(weight)
+    return mix
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+class LoadRun:
+    """Shared state and results of one load test."""
+
+    def __init__(self, app: Flask, mix: dict[str, int], password: str, seed: int) -> None:
+        self.app = app
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.password = password
+        self.seed = seed
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = Lock()
+
+    def record(self, action: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.setdefault(action, []).append(elapsed)
+            if not ok:
+                self.errors[action] = self.errors.get(action, 0) + 1
+
+    def worker(self, index: int, username: str, requests: int) -> None:
+        """Log in as one user and issue `requests` weighted requests."""
+        rng = random.Random(self.seed + index)
+        client = self.app.test_client()
+
+        with self.app.app_context():
+            user_id = db.session.scalar(select(User.id).where(User.username == username))
+            task_ids = db.session.scalars(
+                select(Task.id).where(Task.user_id == user_id).limit(200)
+            ).all()
+            db.session.remove()
+
+        self.timed("login", client.post, "/login",
+                   data={"username_or_email": username, "password": self.password})
+
+        for _ in range(requests):
+            action = rng.choices(self.actions, self.weights)[0]
+            if action == "dashboard":
+                self.timed(action, client.get, "/dashboard")
+            elif action == "create":
+                self.timed(action, client.post, "/create-task", data=self.task_form(rng))
+            elif action == "edit" and task_ids:
+                # Load the form first, like a browser; only the save is timed
+                task_id = rng.choice(task_ids)
+                form = self.edit_form(client, task_id)
+                self.timed(action, client.post, f"/edit-task/{task_id}",
+                           data={**form, **self.task_form(rng)}, ok=self.edit_saved)
+            elif action == "toggle" and task_ids:
+                self.timed(action, client.get, f"/complete-task/{rng.choice(task_ids)}")
+            elif action == "login":
+                client.get("/logout")
+                self.timed(action, client.post, "/login",
+                           data={"username_or_email": username, "password": self.password})
+
+    def timed(self, action: str, call, *args, ok=None, **kwargs) -> None:
+        start = perf_counter()
+        response = call(*args, **kwargs)
+        response.get_data()
+        self.record(action, perf_counter() - start, ok(response) if ok else response.status_code < 400)
+
+    @staticmethod
+    def edit_form(client, task_id: int) -> dict[str, str]:
+        """Hidden version and original values from a task's edit page."""
+        return dict(HIDDEN_INPUT.findall(client.get(f"/edit-task/{task_id}").get_data(as_text=True)))
+
+    @staticmethod
+    def edit_saved(response) -> bool:
+        """A saved edit returns to the dashboard; a conflict goes back to the form."""
+        return response.status_code == 302 and "/edit-task/" not in response.location
+
+    @staticmethod
+    def task_form(rng: random.Random) -> dict[str, str]:
+        due = datetime.now() + timedelta(days=rng.randint(1, 30))
+        return {
+            "title": f"Load task {rng.randint(1, 10**6)}",
+            "description": "Generated by the load-test harness",
+            "priority": rng.choice(["low", "medium", "high"]),
+            "due_date": due.strftime("%Y-%m-%dT%H:%M"),
+        }
+
+
+def run_load(
+    app: Flask,
+    requests: int,
+    concurrency: int,
+    usernames: list[str],
+    mix: dict[str, int] | None = None,
+    password: str = "loadtest1",
+    seed: int = 1,
+) -> tuple[LoadRun, float]:
+    """Run the load test and return the results and wall-clock seconds."""
+    # Every simulated client shares one address, so auth rate limits would
+    # measure the limiter rather than the app
+    app.config["RATELIMIT_ENABLED"] = False
+    run = LoadRun(app, mix or DEFAULT_MIX, password, seed)
+    per_worker = max(1, requests // concurrency)
+    threads = [
+        Thread(target=run.worker, args=(i, usernames[i % len(usernames)], per_worker))
+        for i in range(concurrency)
+    ]
+
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return run, perf_counter() - start
+
+
+def format_report(run: LoadRun, elapsed: float) -> str:
+    """Tabulate per-route throughput and latency percentiles in milliseconds."""
+    header = f"{'route':<10} {'count':>7} {'errors':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    lines = [header, "-" * len(header)]
+    total = 0
+    for action, samples in sorted(run.latencies.items()):
+        samples.sort()
+        total += len(samples)
+        lines.append(
+            f"{action:<10} {len(samples):>7} {run.errors.get(action, 0):>6} "
+            f"{len(samples) / elapsed:>8.1f} "
+            f"{percentile(samples, 50) * 1000:>8.1f} "
+            f"{percentile(samples, 95) * 1000:>8.1f} "
+            f"{percentile(samples, 99) * 1000:>8.1f}"
+        )
+    lines.append(f"Total: {total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+    return "\n".join(lines)
+
+
+@click.command("loadtest")
+@click.option("--requests", type=int, default=2000, show_default=True)
+@click.option("--concurrency", type=int, default=8, show_default=True)
+@click.option("--users", type=int, default=100, show_default=True, help="Synthetic users to log in as.")
+@click.option("--prefix", default="load", show_default=True)
+@click.option("--password", default="loadtest1", show_default=True)
+@click.option("--mix", default=None, help="Weights, e.g. dashboard=50,create=10,edit=10,toggle=25,login=5")
+@click.option("--seed", type=int, default=1, show_default=True)
+@with_appcontext
+def loadtest_command(requests, concurrency, users, prefix, password, mix, seed) -> None:
+    """Replay a traffic mix against the app and report latency per route."""
+    usernames = [f"{prefix}{i}" for i in range(users)]
+    if not db.session.scalar(select(User.id).where(User.username == usernames[0])):
+        raise click.ClickException("No synthetic users found; run 'flask seed-synthetic' first.")
+
+    app = current_app._get_current_object()
+    run, elapsed = run_load(
+        app, requests, concurrency, usernames, parse_mix(mix) if mix else None, password, seed
+    )
+    click.echo(format_report(run, elapsed))
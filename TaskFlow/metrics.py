@@ -0,0 +1,216 @@
+"""
+Performance instrumentation:
+Per-route latency, SQL and template timing, a slow-query log and a
+Prometheus text /metrics endpoint. Metrics are kept per process.
+"""
+
+import logging
+from threading import Lock
+from time import perf_counter
+from flask import Flask, Response, abort, current_app, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from models import db
+
+
+slow_query_logger = logging.getLogger("taskflow.slow_query")
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        """Render bucket, sum and count samples."""
+        out = []
+        cumulative = 0
+        prefix = f"{labels}," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class Metrics:
+    """Collects request, SQL and template timings for one app."""
+
+    def __init__(self) -> None:
+        self.slow_query_threshold = 0.1
+        self._lock = Lock()
+        self._histograms: dict[str, dict[str, Histogram]] = {}
+        self._counters: dict[str, dict[str, float]] = {}
+
+    def init_app(self, app: Flask) -> None:
+        """Register request hooks, engine events, signals and the endpoint."""
+        if app.config.get("METRICS_REQUIRE_TOKEN") and not app.config.get("METRICS_TOKEN"):
+            raise RuntimeError("METRICS_TOKEN environment variable must be set.")
+        self.slow_query_threshold = app.config.get("SLOW_QUERY_THRESHOLD_MS", 100) / 1000
+        app.extensions["metrics"] = self
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(engine, "handle_error", self._handle_error)
+
+        before_render_template.connect(self._before_render, app, weak=False)
+        template_rendered.connect(self._after_render, app, weak=False)
+
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+
+    def observe(self, name: str, labels: str, value: float, buckets: tuple) -> None:
+        """Record a value in a labelled histogram."""
+        with self._lock:
+            family = self._histograms.setdefault(name, {})
+            histogram = family.get(labels)
+            if histogram is None:
+                histogram = family[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, labels: str = "", value: float = 1) -> None:
+        """Add to a labelled counter."""
+        with self._lock:
+            family = self._counters.setdefault(name, {})
+            family[labels] = family.get(labels, 0) + value
+
+    # Request hooks
+
+    def _start_request(self) -> None:
+        g.metrics_start = perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+
+    def _finish_request(self, response: Response) -> Response:
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+
+        route = request.endpoint or "unmatched"
+        labels = f'route="{route}",method="{request.method}"'
+        self.increment("taskflow_responses_total", f'{labels},status="{response.status_code}"')
+
+        # Streamed bodies (the dashboard, exports) are produced after this
+        # hook, so timings stop when the server closes the response. The
+        # request context may be gone by then; `g` keeps the SQL totals.
+        request_g = g._get_current_object()
+
+        def finished() -> None:
+            self.observe("taskflow_request_duration_seconds", labels, perf_counter() - start, LATENCY_BUCKETS)
+            self.observe("taskflow_request_sql_statements", labels, request_g.sql_count, COUNT_BUCKETS)
+            self.observe("taskflow_request_sql_duration_seconds", labels, request_g.sql_time, LATENCY_BUCKETS)
+
+        response.call_on_close(finished)
+        return response
+
+    # SQLAlchemy engine events
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = perf_counter() - conn.info["query_start"].pop()
+        if has_request_context():
+            g.sql_count = g.get("sql_count", 0) + 1
+            g.sql_time = g.get("sql_time", 0.0) + elapsed
+
+        if elapsed >= self.slow_query_threshold:
+            self.increment("taskflow_slow_queries_total")
+            slow_query_logger.warning(
+                "Slow query (%.1f ms) on %s: %s",
+                elapsed * 1000,
+                request.endpoint if has_request_context() else "-",
+                " ".join(statement.split()),
+            )
+
+    def _handle_error(self, context) -> None:
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is None or context.statement is None:
+            return
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+    # Template signals
+
+    def _before_render(self, app: Flask, template, context) -> None:
+        g.setdefault("template_starts", []).append(perf_counter())
+
+    def _after_render(self, app: Flask, template, context) -> None:
+        starts = g.get("template_starts")
+        if not starts:
+            return
+        labels = f'template="{template.name}"'
+        self.observe("taskflow_template_render_seconds", labels, perf_counter() - starts.pop(), LATENCY_BUCKETS)
+
+    # Exposition
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines: list[str] = []
+        with self._lock:
+            for name, family in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(family.items()):
+                    lines.extend(histogram.lines(name, labels))
+            for name, family in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(family.items()):
+                    suffix = f"{{{labels}}}" if labels else ""
+                    # repr keeps every digit; :g would round large counts to 6 places
+                    lines.append(f"{name}{suffix} {float(value)!r}")
+
+        for name in ("user_cache", "recurrence_cache", "shard_directory"):
+            cache = current_app.extensions.get(name)
+            if cache is None:
+                continue
+            stats = cache.stats()
+            lines.append(f"# TYPE taskflow_{name}_hits_total counter")
+            lines.append(f"taskflow_{name}_hits_total {stats['hits']}")
+            lines.append(f"# TYPE taskflow_{name}_misses_total counter")
+            lines.append(f"taskflow_{name}_misses_total {stats['misses']}")
+            lines.append(f"# TYPE taskflow_{name}_size gauge")
+            lines.append(f"taskflow_{name}_size {stats['size']}")
+
+        event_hub = current_app.extensions.get("event_hub")
+        if event_hub is not None and hasattr(event_hub.backend, "subscriber_count"):
+            lines.append("# TYPE taskflow_event_subscribers gauge")
+            lines.append(f"taskflow_event_subscribers {event_hub.backend.subscriber_count()}")
+
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self) -> Response:
+        """Serve metrics; requires METRICS_TOKEN as a bearer token when set."""
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Shared per-process collector
+metrics = Metrics()
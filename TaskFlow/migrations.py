@@ -0,0 +1,526 @@
+"""
+Schema migrations:
+Ordered, versioned schema changes recorded in the schema_version table.
+Each step defines its own tables instead of importing the models, so it
+keeps producing the same schema as the models evolve.
+"""
+
+import click
+from collections.abc import Callable
+from datetime import datetime
+from flask import Flask
+from flask.cli import with_appcontext
+from sqlalchemy import (
+    Boolean, Column, Connection, DateTime, Engine, ForeignKey, Index, Integer, MetaData,
+    String, Table, Text, UniqueConstraint, case, func, inspect, text, update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from models import db
+
+
+# (version, description, upgrade function), in order
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, description: str):
+    """Register an upgrade step for a schema version."""
+    def register(upgrade: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, upgrade))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return upgrade
+    return register
+
+
+def latest_version() -> int:
+    """Version the code expects the database to be at."""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def add_column(conn: Connection, table: str, column: Column) -> None:
+    """Add a column unless it already exists."""
+    existing = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    for foreign_key in column.foreign_keys:
+        target_table, target_column = foreign_key.target_fullname.split(".")
+        ddl += f" REFERENCES {target_table} ({target_column})"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+
+# Schema history
+# Steps use checkfirst so databases created by the old db.create_all() upgrade cleanly.
+
+
+@migration(1, "Create users and tasks tables")
+def create_core_tables(conn: Connection) -> None:
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("username", String(80), unique=True, nullable=False, index=True),
+        Column("email", String(120), unique=True, nullable=False, index=True),
+        Column("password_hash", String(255), nullable=False),
+        Column("first_name", String(50), nullable=False),
+        Column("last_name", String(50), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+    )
+    Table(
+        "tasks", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("title", String(200), nullable=False),
+        Column("description", Text, nullable=False),
+        Column("completed", Boolean, nullable=False),
+        Column("priority", String(20), nullable=False),
+        Column("category", String(50), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Column("due_date", DateTime),
+        Column("completed_at", DateTime),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+@migration(2, "Add user_task_stats and per-user overdue index")
+def create_user_task_stats(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    tasks = Table(
+        "tasks", metadata,
+        Column("user_id", Integer), Column("completed", Boolean), Column("due_date", DateTime),
+    )
+    Table(
+        "user_task_stats", metadata,
+        Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+        Column("dimension", String(20), primary_key=True),
+        Column("value", String(50), primary_key=True),
+        Column("count", Integer, nullable=False),
+    ).create(conn, checkfirst=True)
+    Index("ix_tasks_user_completed_due", tasks.c.user_id, tasks.c.completed, tasks.c.due_date).create(
+        conn, checkfirst=True
+    )
+
+    # Count existing tasks the way rebuild_stats does; from here on every
+    # task write keeps the counters in step
+    conn.execute(text("DELETE FROM user_task_stats"))
+    conn.execute(text(
+        "INSERT INTO user_task_stats (user_id, dimension, value, count) "
+        "SELECT user_id, 'status', CASE WHEN completed THEN 'completed' ELSE 'pending' END, COUNT(*) "
+        "FROM tasks GROUP BY user_id, completed"
+    ))
+    for dimension in ("priority", "category"):
+        conn.execute(text(
+            "INSERT INTO user_task_stats (user_id, dimension, value, count) "
+            f"SELECT user_id, '{dimension}', {dimension}, COUNT(*) FROM tasks GROUP BY user_id, {dimension}"
+        ))
+
+
+@migration(3, "Add task_reminders and overdue sweep index")
+def create_task_reminders(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    tasks = Table(
+        "tasks", metadata,
+        Column("id", Integer, primary_key=True), Column("completed", Boolean), Column("due_date", DateTime),
+    )
+    reminders = Table(
+        "task_reminders", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("task_id", Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("due_date", DateTime, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        UniqueConstraint("task_id", "due_date", name="uq_task_reminders_task_due"),
+    )
+    reminders.create(conn, checkfirst=True)
+    Index("ix_task_reminders_user_id", reminders.c.user_id).create(conn, checkfirst=True)
+    Index("ix_tasks_completed_due", tasks.c.completed, tasks.c.due_date).create(conn, checkfirst=True)
+
+
+@migration(4, "Add tasks.version for optimistic concurrency")
+def add_task_version(conn: Connection) -> None:
+    add_column(conn, "tasks", Column("version", Integer, nullable=False, server_default=text("1")))
+
+
+@migration(5, "Normalize task categories into a per-user categories table")
+def create_categories(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "categories", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("name", String(50), nullable=False),
+        Column("task_count", Integer, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        UniqueConstraint("user_id", "name", name="uq_categories_user_name"),
+    ).create(conn, checkfirst=True)
+
+    if "category_id" in {col["name"] for col in inspect(conn).get_columns("tasks")}:
+        return
+
+    # Names are normalized like categories.normalize_name (the column already
+    # caps them at 50 characters), so "Work" and "work " become one category
+    def normalized(column: str) -> str:
+        return f"COALESCE(NULLIF(LOWER(TRIM({column})), ''), 'general')"
+
+    # One category per distinct (user, name), counts included
+    conn.execute(
+        text(
+            "INSERT INTO categories (user_id, name, task_count, created_at) "
+            f"SELECT user_id, {normalized('category')}, COUNT(*), :now FROM tasks "
+            f"GROUP BY user_id, {normalized('category')}"
+        ),
+        {"now": datetime.now()},
+    )
+    # Category counts now live on the categories rows
+    conn.execute(text("DELETE FROM user_task_stats WHERE dimension = 'category'"))
+
+    columns = (
+        "id, title, description, completed, priority, created_at, updated_at, "
+        "due_date, completed_at, version, user_id"
+    )
+    if conn.dialect.name == "sqlite":
+        # SQLite can't add a NOT NULL foreign key or drop columns in place, so rebuild the table
+        tasks = Table(
+            "tasks_new", metadata,
+            Column("id", Integer, primary_key=True),
+            Column("title", String(200), nullable=False),
+            Column("description", Text, nullable=False),
+            Column("completed", Boolean, nullable=False),
+            Column("priority", String(20), nullable=False),
+            Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
+            Column("created_at", DateTime, nullable=False),
+            Column("updated_at", DateTime, nullable=False),
+            Column("due_date", DateTime),
+            Column("completed_at", DateTime),
+            Column("version", Integer, nullable=False, server_default=text("1")),
+            Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        )
+        tasks.create(conn)
+        conn.execute(text(
+            f"INSERT INTO tasks_new ({columns}, category_id) "
+            f"SELECT {', '.join('t.' + name for name in columns.split(', '))}, c.id "
+            f"FROM tasks t JOIN categories c ON c.user_id = t.user_id AND c.name = {normalized('t.category')}"
+        ))
+        conn.execute(text("DROP TABLE tasks"))
+        conn.execute(text("ALTER TABLE tasks_new RENAME TO tasks"))
+    else:
+        add_column(conn, "tasks", Column("category_id", Integer))
+        conn.execute(text(
+            "UPDATE tasks SET category_id = (SELECT c.id FROM categories c "
+            f"WHERE c.user_id = tasks.user_id AND c.name = {normalized('tasks.category')})"
+        ))
+        conn.execute(text("ALTER TABLE tasks ALTER COLUMN category_id SET NOT NULL"))
+        conn.execute(text(
+            "ALTER TABLE tasks ADD FOREIGN KEY (category_id) REFERENCES categories (id)"
+        ))
+        conn.execute(text("ALTER TABLE tasks DROP COLUMN category"))
+
+    # The rebuilt table needs its indexes back; checkfirst keeps other backends' ones
+    indexed = Table(
+        "tasks", MetaData(),
+        Column("user_id", Integer), Column("completed", Boolean),
+        Column("due_date", DateTime), Column("category_id", Integer),
+    )
+    for index in (
+        Index("ix_tasks_user_completed_due", indexed.c.user_id, indexed.c.completed, indexed.c.due_date),
+        Index("ix_tasks_completed_due", indexed.c.completed, indexed.c.due_date),
+        Index("ix_tasks_user_category", indexed.c.user_id, indexed.c.category_id),
+    ):
+        index.create(conn, checkfirst=True)
+
+
+@migration(6, "Add recurring_tasks and task occurrence columns")
+def create_recurring_tasks(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table("categories", metadata, Column("id", Integer, primary_key=True))
+    recurring = Table(
+        "recurring_tasks", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("title", String(200), nullable=False),
+        Column("description", Text, nullable=False),
+        Column("priority", String(20), nullable=False),
+        Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
+        Column("rule", String(200), nullable=False),
+        Column("starts_at", DateTime, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+    )
+    recurring.create(conn, checkfirst=True)
+    Index("ix_recurring_tasks_user_id", recurring.c.user_id).create(conn, checkfirst=True)
+
+    add_column(conn, "tasks", Column("recurrence_id", Integer, ForeignKey("recurring_tasks.id")))
+    add_column(conn, "tasks", Column("occurrence", DateTime))
+    tasks = Table("tasks", metadata, Column("recurrence_id", Integer), Column("occurrence", DateTime))
+    Index(
+        "uq_tasks_recurrence_occurrence", tasks.c.recurrence_id, tasks.c.occurrence, unique=True
+    ).create(conn, checkfirst=True)
+
+
+@migration(7, "Add sync index on tasks and task_tombstones")
+def create_sync_tables(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    tasks = Table(
+        "tasks", metadata,
+        Column("id", Integer, primary_key=True), Column("user_id", Integer), Column("updated_at", DateTime),
+    )
+    tombstones = Table(
+        "task_tombstones", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("task_id", Integer, nullable=False),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("deleted_at", DateTime, nullable=False),
+    )
+    tombstones.create(conn, checkfirst=True)
+    Index(
+        "ix_task_tombstones_user_deleted", tombstones.c.user_id, tombstones.c.deleted_at, tombstones.c.id
+    ).create(conn, checkfirst=True)
+    Index("ix_tasks_user_updated", tasks.c.user_id, tasks.c.updated_at, tasks.c.id).create(
+        conn, checkfirst=True
+    )
+
+
+@migration(8, "Add archived_tasks and archival index on tasks")
+def create_archived_tasks(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table("categories", metadata, Column("id", Integer, primary_key=True))
+    Table("recurring_tasks", metadata, Column("id", Integer, primary_key=True))
+    archived = Table(
+        "archived_tasks", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("title", String(200), nullable=False),
+        Column("description", Text, nullable=False),
+        Column("priority", String(20), nullable=False),
+        Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Column("due_date", DateTime),
+        Column("completed_at", DateTime, nullable=False),
+        Column("archived_at", DateTime, nullable=False),
+        Column("recurrence_id", Integer, ForeignKey("recurring_tasks.id")),
+        Column("occurrence", DateTime),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    )
+    archived.create(conn, checkfirst=True)
+    Index(
+        "ix_archived_tasks_user_completed",
+        archived.c.user_id, archived.c.completed_at, archived.c.id,
+    ).create(conn, checkfirst=True)
+
+    tasks = Table("tasks", metadata, Column("completed", Boolean), Column("completed_at", DateTime))
+    Index("ix_tasks_completed_at", tasks.c.completed, tasks.c.completed_at).create(
+        conn, checkfirst=True
+    )
+
+
+@migration(9, "Add stored task excerpts")
+def add_task_excerpt(conn: Connection) -> None:
+    # Mirrors models.make_excerpt; SQL length() and substr() count characters
+    add_column(conn, "tasks", Column("excerpt", String(103), nullable=False, server_default=text("''")))
+    tasks = Table(
+        "tasks", MetaData(), Column("description", Text), Column("excerpt", String(103))
+    )
+    conn.execute(
+        update(tasks).values(
+            excerpt=case(
+                (func.length(tasks.c.description) > 100, func.substr(tasks.c.description, 1, 100, type_=Text) + "..."),
+                else_=tasks.c.description,
+            )
+        )
+    )
+
+
+@migration(10, "Add user_shards directory")
+def create_user_shards(conn: Connection) -> None:
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    shards = Table(
+        "user_shards", metadata,
+        Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+        Column("shard", String(50), nullable=False),
+        Column("moving", Boolean, nullable=False),
+    )
+    shards.create(conn, checkfirst=True)
+    Index("ix_user_shards_shard", shards.c.shard).create(conn, checkfirst=True)
+
+
+@migration(11, "Never reuse task ids on SQLite")
+def add_tasks_autoincrement(conn: Connection) -> None:
+    # Without AUTOINCREMENT, SQLite hands out max(id) + 1, so an id freed by
+    # archiving or deleting the newest task is given to the next one. Other
+    # backends' sequences never go back.
+    if conn.dialect.name != "sqlite":
+        return
+    if "AUTOINCREMENT" in conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'")
+    ).scalar().upper():
+        return
+
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True))
+    Table("categories", metadata, Column("id", Integer, primary_key=True))
+    Table("recurring_tasks", metadata, Column("id", Integer, primary_key=True))
+    columns = (
+        "id, title, description, completed, priority, category_id, created_at, updated_at, "
+        "due_date, completed_at, version, user_id, recurrence_id, occurrence, excerpt"
+    )
+    Table(
+        "tasks_new", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("title", String(200), nullable=False),
+        Column("description", Text, nullable=False),
+        Column("completed", Boolean, nullable=False),
+        Column("priority", String(20), nullable=False),
+        Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+        Column("due_date", DateTime),
+        Column("completed_at", DateTime),
+        Column("version", Integer, nullable=False, server_default=text("1")),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("recurrence_id", Integer, ForeignKey("recurring_tasks.id")),
+        Column("occurrence", DateTime),
+        Column("excerpt", String(103), nullable=False, server_default=text("''")),
+        sqlite_autoincrement=True,
+    ).create(conn)
+    conn.execute(text(f"INSERT INTO tasks_new ({columns}) SELECT {columns} FROM tasks"))
+    conn.execute(text("DROP TABLE tasks"))
+    conn.execute(text("ALTER TABLE tasks_new RENAME TO tasks"))
+
+    # Start past every id handed out so far, including archived and deleted tasks
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'tasks'"))
+    conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', MAX("
+        "(SELECT COALESCE(MAX(id), 0) FROM tasks), "
+        "(SELECT COALESCE(MAX(id), 0) FROM archived_tasks), "
+        "(SELECT COALESCE(MAX(task_id), 0) FROM task_tombstones))"
+    ))
+
+    # The rebuilt table needs its indexes back
+    tasks = Table(
+        "tasks", MetaData(),
+        Column("id", Integer), Column("user_id", Integer), Column("completed", Boolean),
+        Column("due_date", DateTime), Column("category_id", Integer), Column("recurrence_id", Integer),
+        Column("occurrence", DateTime), Column("updated_at", DateTime), Column("completed_at", DateTime),
+    )
+    for index in (
+        Index("ix_tasks_user_completed_due", tasks.c.user_id, tasks.c.completed, tasks.c.due_date),
+        Index("ix_tasks_completed_due", tasks.c.completed, tasks.c.due_date),
+        Index("ix_tasks_user_category", tasks.c.user_id, tasks.c.category_id),
+        Index("uq_tasks_recurrence_occurrence", tasks.c.recurrence_id, tasks.c.occurrence, unique=True),
+        Index("ix_tasks_user_updated", tasks.c.user_id, tasks.c.updated_at, tasks.c.id),
+        Index("ix_tasks_completed_at", tasks.c.completed, tasks.c.completed_at),
+    ):
+        index.create(conn)
+
+
+# Version bookkeeping
+
+
+def ensure_version_table(conn: Connection) -> None:
+    """Create the single-row schema_version table if missing."""
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+
+
+def current_version(conn: Connection) -> int:
+    """Read the recorded schema version (0 for a fresh database)."""
+    version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+def set_version(conn: Connection, version: int) -> None:
+    """Record the schema version."""
+    conn.execute(text("DELETE FROM schema_version"))
+    conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+
+def upgrade(
+    target: int | None = None,
+    echo: Callable[[str], None] | None = None,
+    engine: Engine | None = None,
+) -> int:
+    """
+    Apply pending migrations up to `target` (default: latest), one
+    transaction per step, to `engine` (default: the main database).
+    Returns the resulting version.
+    """
+    target = latest_version() if target is None else target
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        version = current_version(conn)
+
+    for step, description, apply in MIGRATIONS:
+        if step <= version or step > target:
+            continue
+        with engine.begin() as conn:
+            apply(conn)
+            set_version(conn, step)
+        version = step
+        if echo:
+            echo(f"Applied {step}: {description}")
+    return version
+
+
+def check_schema(app: Flask) -> None:
+    """
+    Startup check: one query comparing the recorded version with the code's.
+    SCHEMA_CHECK is "warn" (default), "strict" (refuse to start) or "off".
+    """
+    mode = app.config.get("SCHEMA_CHECK", "warn")
+    if mode == "off":
+        return
+
+    # The main database and every shard share the same schema
+    expected = latest_version()
+    with app.app_context():
+        for key, engine in db.engines.items():
+            try:
+                with engine.connect() as conn:
+                    version = current_version(conn)
+            except SQLAlchemyError:
+                version = 0
+            if version == expected:
+                continue
+
+            name = "Database" if key is None else f"Shard '{key}'"
+            message = f"{name} schema is at version {version}, code expects {expected}. Run 'flask db-upgrade'."
+            if mode == "strict" and version < expected:
+                raise RuntimeError(message)
+            app.logger.warning(message)
+
+
+@click.command("db-upgrade")
+@click.option("--to", "target", type=int, default=None, help="Stop at this version.")
+@with_appcontext
+def db_upgrade_command(target: int | None) -> None:
+    """Apply pending schema migrations to the main database and every shard."""
+    for key, engine in db.engines.items():
+        version = upgrade(target, echo=click.echo, engine=engine)
+        name = "Database" if key is None else f"Shard '{key}'"
+        click.echo(f"{name} schema is at version {version}.")
+
+
+@click.command("db-version")
+@with_appcontext
+def db_version_command() -> None:
+    """Show the recorded and expected schema versions."""
+    for key, engine in db.engines.items():
+        with engine.connect() as conn:
+            try:
+                version = current_version(conn)
+            except SQLAlchemyError:
+                version = 0
+        name = "Database" if key is None else f"Shard '{key}'"
+        click.echo(f"{name}: {version}, code: {latest_version()}")
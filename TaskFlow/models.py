@@ -3,14 +3,59 @@ Database models:
 This file defines the database schema and relationship between different entities.
 """
 
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Table, UpdateBase, and_, inspect
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+
+# Tables holding a user's own data; with sharding they live in the user's shard,
+# while users and the shard directory stay in the main database
+TENANT_TABLES = frozenset({
+    "tasks", "archived_tasks", "categories", "recurring_tasks",
+    "user_task_stats", "task_tombstones", "task_reminders",
+})
+
+
+class ShardSession(Session):
+    """
+    Session that sends statements on tenant tables to the shard chosen for
+    the current request or job (`g.shard`, a SQLALCHEMY_BINDS key).
+    Everything else, and everything when no shard is set, uses the main database.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        shard = g.get("shard") if has_app_context() else None
+        if bind is None and shard is not None:
+            table = None
+            if mapper is not None:
+                table = inspect(mapper).local_table
+            elif isinstance(clause, Table):
+                table = clause
+            elif isinstance(clause, UpdateBase):
+                table = clause.table
+            if table is not None and table.name in TENANT_TABLES:
+                return self._db.engines[shard]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # SQLAlchemy init
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": ShardSession})
+
+# Task card presentation
+PRIORITY_BADGES = {"low": "success", "medium": "warning", "high": "danger"}
+EXCERPT_LENGTH = 100
+
+
+def make_excerpt(description: str) -> str:
+    """Description shortened for task cards."""
+    if len(description) > EXCERPT_LENGTH:
+        return description[:EXCERPT_LENGTH] + "..."
+    return description
 
 
 class User(UserMixin, db.Model):
@@ -71,13 +116,34 @@ class Task(db.Model):
     """
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the per-user overdue count (pending tasks past due date)
+        db.Index("ix_tasks_user_completed_due", "user_id", "completed", "due_date"),
+        # Serves overdue sweeps and the reminder scheduler across all users
+        db.Index("ix_tasks_completed_due", "completed", "due_date"),
+        # Serves the dashboard's category facet
+        db.Index("ix_tasks_user_category", "user_id", "category_id"),
+        # An occurrence of a recurring task is materialized at most once
+        db.Index("uq_tasks_recurrence_occurrence", "recurrence_id", "occurrence", unique=True),
+        # Serves "changes since" sync queries in keyset order
+        db.Index("ix_tasks_user_updated", "user_id", "updated_at", "id"),
+        # Serves the archival job's scan for long-completed tasks
+        db.Index("ix_tasks_completed_at", "completed", "completed_at"),
+        # Ids are never reused, so an archived task can always move back under its id
+        {"sqlite_autoincrement": True},
+    )
 
     # Primary key
     id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
 
     # Task content
     title: Mapped[str] = mapped_column(db.String(200), nullable=False)
-    description: Mapped[str] = mapped_column(db.Text, nullable=False)
+
+    # Full description, only loaded when accessed; cards read the stored excerpt
+    description: Mapped[str] = mapped_column(db.Text, nullable=False, deferred=True)
+    excerpt: Mapped[str] = mapped_column(
+        db.String(EXCERPT_LENGTH + 3), nullable=False, server_default=""
+    )
 
     # Status (true, false) and priority (low, medium, high)
     completed: Mapped[bool] = mapped_column(db.Boolean, default=False, nullable=False)
@@ -85,10 +151,11 @@ class Task(db.Model):
         db.String(20), default="medium", nullable=False
     )
 
-    # Category
-    category: Mapped[str] = mapped_column(
-        db.String(50), default="general", nullable=False
+    # Category, one of the owner's rows in the categories table
+    category_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("categories.id"), nullable=False
     )
+    category: Mapped["Category"] = relationship("Category")
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
@@ -98,12 +165,31 @@ class Task(db.Model):
     due_date: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
     completed_at: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
 
+    # Recurring task this is an occurrence of, and the occurrence it stands for
+    recurrence_id: Mapped[int | None] = mapped_column(
+        db.Integer, db.ForeignKey("recurring_tasks.id"), nullable=True
+    )
+    occurrence: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
+
+    # Optimistic concurrency: bumped by every write, checked by edits
+    version: Mapped[int] = mapped_column(
+        db.Integer, nullable=False, server_default=db.text("1")
+    )
+
     # Foreign key linking task to user
     user_id: Mapped[int] = mapped_column(
         db.Integer, db.ForeignKey("users.id"), nullable=False
     )
     user: Mapped["User"] = relationship("User", back_populates="tasks")
 
+    __mapper_args__ = {"version_id_col": version}
+
+    @validates("description")
+    def _set_excerpt(self, key: str, description: str) -> str:
+        """Keep the excerpt in step with descriptions set through the ORM."""
+        self.excerpt = make_excerpt(description)
+        return description
+
     def mark_complete(self) -> None:
         """Mark the task completed and record completion time."""
         self.completed = True
@@ -114,12 +200,37 @@ class Task(db.Model):
         self.completed = False
         self.completed_at = None
 
-    def check_overdue(self) -> bool:
-        """Check if the task is past due date and not completed."""
+    @hybrid_property
+    def is_overdue(self) -> bool:
+        """True if the task is past due date and not completed."""
         if self.due_date and not self.completed:
             return datetime.now() > self.due_date
         return False
 
+    @is_overdue.inplace.expression
+    @classmethod
+    def _is_overdue_expression(cls):
+        """SQL form of is_overdue, answerable from the (completed, due_date) index."""
+        return and_(
+            cls.completed.is_(False),
+            cls.due_date.is_not(None),
+            cls.due_date < datetime.now(),
+        )
+
+    def check_overdue(self) -> bool:
+        """Check if the task is past due date and not completed."""
+        return self.is_overdue
+
+    @property
+    def badge_cls(self) -> str:
+        """Bootstrap badge colour for the priority."""
+        return PRIORITY_BADGES.get(self.priority, "secondary")
+
+    @property
+    def due_label(self) -> str | None:
+        """Due date formatted for task cards."""
+        return self.due_date.strftime("%b %d, %Y") if self.due_date else None
+
     def get_priority_cls(self) -> str:
         """Return class name based on priority for CSS styling."""
         priority_cls = {
@@ -132,3 +243,233 @@ class Task(db.Model):
     def __repr__(self) -> str:
         """Task object representation for debugging."""
         return f"<Task({self.id}, {self.title}, {self.priority})>"
+
+
+class Category(db.Model):
+    """
+    A user's task category.
+    task_count is kept in step with the tasks table by the task write paths,
+    so listing categories with their counts never scans the user's tasks.
+    """
+
+    __tablename__ = "categories"
+    __table_args__ = (
+        # One row per name per user; also serves the per-user category listing
+        db.UniqueConstraint("user_id", "name", name="uq_categories_user_name"),
+    )
+
+    # Primary key
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+
+    # Owner and display name
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(db.String(50), nullable=False)
+
+    # Number of the user's tasks in this category
+    task_count: Mapped[int] = mapped_column(db.Integer, default=0, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+
+    def __repr__(self) -> str:
+        """Category object representation for debugging."""
+        return f"<Category({self.user_id}, {self.name}: {self.task_count})>"
+
+
+class RecurringTask(db.Model):
+    """
+    Template for a repeating task and its RRULE-style recurrence rule.
+    Occurrences are expanded on demand and only stored as tasks once
+    they are completed.
+    """
+
+    __tablename__ = "recurring_tasks"
+
+    # Primary key
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+
+    # Owner
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
+    )
+
+    # Fields copied onto each materialized occurrence
+    title: Mapped[str] = mapped_column(db.String(200), nullable=False)
+    description: Mapped[str] = mapped_column(db.Text, nullable=False)
+    priority: Mapped[str] = mapped_column(
+        db.String(20), default="medium", nullable=False
+    )
+    category_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("categories.id"), nullable=False
+    )
+
+    # Rule, e.g. "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE", and the first occurrence
+    rule: Mapped[str] = mapped_column(db.String(200), nullable=False)
+    starts_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(
+        db.DateTime, default=datetime.now, onupdate=datetime.now
+    )
+
+    def __repr__(self) -> str:
+        """Recurring task representation for debugging."""
+        return f"<RecurringTask({self.id}, {self.title}, {self.rule})>"
+
+
+class UserTaskStat(db.Model):
+    """
+    Materialized task counters for a user.
+    One row per (dimension, value) pair, e.g. ("priority", "high"),
+    kept in step with the tasks table by the task write paths.
+    """
+
+    __tablename__ = "user_task_stats"
+
+    # Composite primary key
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), primary_key=True
+    )
+    dimension: Mapped[str] = mapped_column(db.String(20), primary_key=True)
+    value: Mapped[str] = mapped_column(db.String(50), primary_key=True)
+
+    # Number of tasks with this value
+    count: Mapped[int] = mapped_column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        """Stat object representation for debugging."""
+        return f"<UserTaskStat({self.user_id}, {self.dimension}={self.value}: {self.count})>"
+
+
+class ArchivedTask(db.Model):
+    """
+    A completed task moved out of the tasks table by the archival job.
+    Keeps the task's id and fields, so reopening it can move it back.
+    """
+
+    __tablename__ = "archived_tasks"
+    __table_args__ = (
+        # Serves the archive view, newest completions first
+        db.Index("ix_archived_tasks_user_completed", "user_id", "completed_at", "id"),
+    )
+
+    # Primary key, the id the task had in the tasks table
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+
+    # Task content
+    title: Mapped[str] = mapped_column(db.String(200), nullable=False)
+    description: Mapped[str] = mapped_column(db.Text, nullable=False)
+    priority: Mapped[str] = mapped_column(db.String(20), nullable=False)
+    category_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("categories.id"), nullable=False
+    )
+    category: Mapped["Category"] = relationship("Category")
+
+    # Timestamps carried over from the task, plus when it was archived
+    created_at: Mapped[datetime] = mapped_column(db.DateTime)
+    updated_at: Mapped[datetime] = mapped_column(db.DateTime)
+    due_date: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
+    completed_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+
+    # Recurring task occurrence, if it was one
+    recurrence_id: Mapped[int | None] = mapped_column(
+        db.Integer, db.ForeignKey("recurring_tasks.id"), nullable=True
+    )
+    occurrence: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
+
+    # Owner
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False
+    )
+
+    @property
+    def badge_cls(self) -> str:
+        """Bootstrap badge colour for the priority."""
+        return PRIORITY_BADGES.get(self.priority, "secondary")
+
+    def __repr__(self) -> str:
+        """Archived task representation for debugging."""
+        return f"<ArchivedTask({self.id}, {self.title}, {self.completed_at})>"
+
+
+class TaskTombstone(db.Model):
+    """
+    Record of a deleted task, so syncing clients can drop their copy.
+    Kept for SYNC_TOMBSTONE_RETENTION_DAYS, then purged.
+    """
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        # Serves "deleted since" sync queries in keyset order
+        db.Index("ix_task_tombstones_user_deleted", "user_id", "deleted_at", "id"),
+    )
+
+    # Primary key
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+
+    # The deleted task and its owner
+    task_id: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False
+    )
+
+    deleted_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+
+    def __repr__(self) -> str:
+        """Tombstone representation for debugging."""
+        return f"<TaskTombstone({self.task_id}, {self.deleted_at})>"
+
+
+class UserShard(db.Model):
+    """
+    Shard directory entry: which shard database holds a user's data.
+    Users without an entry live in the main database.
+    """
+
+    __tablename__ = "user_shards"
+
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), primary_key=True
+    )
+
+    # SHARDS key; counted per shard when placing new users
+    shard: Mapped[str] = mapped_column(db.String(50), nullable=False, index=True)
+
+    # Set while the user's data is copied to another shard; requests wait
+    moving: Mapped[bool] = mapped_column(db.Boolean, default=False, nullable=False)
+
+    def __repr__(self) -> str:
+        """Directory entry representation for debugging."""
+        return f"<UserShard({self.user_id}, {self.shard})>"
+
+
+class TaskReminder(db.Model):
+    """Reminder event recorded when a task passes its due date."""
+
+    __tablename__ = "task_reminders"
+    __table_args__ = (
+        # One reminder per task deadline, even with several schedulers running
+        db.UniqueConstraint("task_id", "due_date", name="uq_task_reminders_task_due"),
+    )
+
+    # Primary key
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+
+    # Task and owner the reminder is for
+    task_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(
+        db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
+    )
+
+    # Deadline that was missed and when it was noticed
+    due_date: Mapped[datetime] = mapped_column(db.DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.now)
+
+    def __repr__(self) -> str:
+        """Reminder object representation for debugging."""
+        return f"<TaskReminder({self.task_id}, {self.due_date})>"
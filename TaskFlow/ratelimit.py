@@ -0,0 +1,84 @@
+"""
+Rate limiting:
+Token-bucket admission control for the anonymous auth endpoints, keyed by
+client address and by account, so throttled requests are turned away
+before password hashing (and, by address, before any database lookup).
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from flask import Flask, current_app
+from werkzeug.utils import import_string
+
+
+class MemoryStore:
+    """
+    Token buckets held in this process. At most `max_keys` buckets are kept;
+    the least recently used are dropped first, which only forgets idle keys.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, capacity: int, rate: float, now: float) -> float:
+        """
+        Take one token from a bucket holding up to `capacity` tokens that
+        refills at `rate` tokens per second. Returns 0 if a token was taken,
+        otherwise the seconds until one will be available.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        """Forget every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+
+# Stores selectable by name; RATELIMIT_STORE may also be a "module:Class" path
+STORES = {"memory": MemoryStore}
+
+
+class RateLimiter:
+    """Applies the configured limits, e.g. RATELIMIT_LOGIN_IP = (20, 60)."""
+
+    def __init__(self) -> None:
+        self.store = MemoryStore()
+
+    def init_app(self, app: Flask) -> None:
+        """Create the configured store."""
+        store = app.config.get("RATELIMIT_STORE", "memory")
+        self.store = (STORES.get(store) or import_string(store))()
+        if hasattr(self.store, "max_keys"):
+            self.store.max_keys = app.config.get("RATELIMIT_MAX_KEYS", self.store.max_keys)
+        app.extensions["rate_limiter"] = self
+
+    def hit(self, scope: str, key: str) -> float:
+        """
+        Count one request against `scope`'s limit for `key`.
+        Returns 0 if allowed, otherwise the seconds to wait.
+        """
+        config = current_app.config
+        if not config.get("RATELIMIT_ENABLED", True):
+            return 0.0
+        count, period = config[f"RATELIMIT_{scope.upper()}"]
+        return self.store.take(f"{scope}:{key}", count, count / period, time())
+
+
+# Shared per-process limiter
+rate_limiter = RateLimiter()
@@ -0,0 +1,279 @@
+"""
+Recurring tasks:
+Parses RRULE-style recurrence rules and expands them lazily for the window
+being viewed. Expansions are cached per user, and an occurrence is only
+stored as a task once it is completed.
+"""
+
+import calendar
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from time import monotonic
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+from cache import TTLCache
+from models import db, PRIORITY_BADGES, RecurringTask, Task
+from stats import record_task_change, task_facets
+
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Rules offered by the task forms
+REPEAT_CHOICES = {
+    "FREQ=DAILY": "Every day",
+    "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR": "Every weekday",
+    "FREQ=WEEKLY": "Every week",
+    "FREQ=WEEKLY;INTERVAL=2": "Every two weeks",
+    "FREQ=MONTHLY": "Every month",
+    "FREQ=YEARLY": "Every year",
+}
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Shift a datetime by whole months, clamping the day to the month's length."""
+    index = value.month - 1 + months
+    year, month = value.year + index // 12, index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_until(value: str) -> datetime:
+    """Parse an UNTIL value; a bare date includes the whole day."""
+    value = value.rstrip("Z")
+    if "T" in value:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    return datetime.strptime(value, "%Y%m%d") + timedelta(days=1, microseconds=-1)
+
+
+class Rule:
+    """
+    A recurrence rule anchored at its first occurrence.
+    Supports FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL, COUNT, UNTIL
+    and BYDAY for weekly rules. Expanding a window jumps straight to it, so
+    the cost depends on the window, not on how far it is from the start.
+    """
+
+    def __init__(self, text: str, start: datetime) -> None:
+        parts: dict[str, str] = {}
+        for part in text.upper().split(";"):
+            key, _, value = part.partition("=")
+            if not value:
+                raise ValueError(f"Invalid rule part '{part}'.")
+            parts[key.strip()] = value.strip()
+
+        unknown = set(parts) - {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY"}
+        if unknown:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(unknown))}.")
+        if parts.get("FREQ") not in FREQUENCIES:
+            raise ValueError(f"Invalid frequency '{parts.get('FREQ')}'.")
+
+        self.freq = parts["FREQ"]
+        self.interval = int(parts.get("INTERVAL", 1))
+        self.count = int(parts["COUNT"]) if "COUNT" in parts else None
+        self.until = parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+        if self.interval < 1 or (self.count is not None and self.count < 1):
+            raise ValueError("INTERVAL and COUNT must be positive.")
+
+        self.byday: list[int] = []
+        if "BYDAY" in parts:
+            if self.freq != "WEEKLY":
+                raise ValueError("BYDAY is only supported for weekly rules.")
+            days = parts["BYDAY"].split(",")
+            if not set(days) <= set(WEEKDAYS):
+                raise ValueError(f"Invalid weekdays '{parts['BYDAY']}'.")
+            self.byday = sorted({WEEKDAYS.index(day) for day in days})
+
+        self.start = start
+        # BYDAY candidates are laid out from the Monday of the first week;
+        # those before the start are not occurrences
+        self._week0 = start - timedelta(days=start.weekday())
+        self._skipped = sum(
+            1 for day in self.byday if self._week0 + timedelta(days=day) < start
+        )
+
+    def _candidate(self, index: int) -> datetime:
+        """The index-th candidate date, in order."""
+        if self.byday:
+            week, slot = divmod(index, len(self.byday))
+            return self._week0 + timedelta(weeks=week * self.interval, days=self.byday[slot])
+        if self.freq == "DAILY":
+            return self.start + timedelta(days=index * self.interval)
+        if self.freq == "WEEKLY":
+            return self.start + timedelta(weeks=index * self.interval)
+        step = self.interval * (12 if self.freq == "YEARLY" else 1)
+        return add_months(self.start, index * step)
+
+    def _index_before(self, moment: datetime) -> int:
+        """A candidate index no later than the first candidate at or after `moment`."""
+        if moment <= self.start:
+            return 0
+        if self.byday:
+            weeks = (moment - self._week0).days // (7 * self.interval)
+            return weeks * len(self.byday)
+        if self.freq == "DAILY":
+            return (moment - self.start).days // self.interval
+        if self.freq == "WEEKLY":
+            return (moment - self.start).days // (7 * self.interval)
+        step = self.interval * (12 if self.freq == "YEARLY" else 1)
+        months = (moment.year - self.start.year) * 12 + moment.month - self.start.month
+        return max(0, months // step - 1)
+
+    def between(self, start: datetime, end: datetime) -> Iterator[datetime]:
+        """Yield occurrences in [start, end), in order."""
+        index = self._index_before(start)
+        while True:
+            when = self._candidate(index)
+            number = index - self._skipped
+            index += 1
+            if when < self.start:
+                continue
+            if self.until and when > self.until:
+                return
+            if self.count is not None and number >= self.count:
+                return
+            if when >= end:
+                return
+            if when >= start:
+                yield when
+
+    def occurs_at(self, when: datetime) -> bool:
+        """True if `when` is one of the rule's occurrences."""
+        return next(self.between(when, when + timedelta(seconds=1)), None) == when
+
+
+class Occurrence:
+    """An expanded occurrence of a recurring task that is not stored yet."""
+
+    __slots__ = ("recurrence_id", "title", "description", "priority", "category_id", "due_date")
+
+    def __init__(self, recurring: RecurringTask, due_date: datetime) -> None:
+        self.recurrence_id = recurring.id
+        self.title = recurring.title
+        self.description = recurring.description
+        self.priority = recurring.priority
+        self.category_id = recurring.category_id
+        self.due_date = due_date
+
+    @property
+    def key(self) -> str:
+        """Occurrence identifier used in URLs."""
+        return self.due_date.isoformat()
+
+    @property
+    def badge_cls(self) -> str:
+        """Bootstrap badge colour for the priority."""
+        return PRIORITY_BADGES.get(self.priority, "secondary")
+
+    @property
+    def due_label(self) -> str:
+        """Due date formatted for task cards."""
+        return self.due_date.strftime("%b %d, %Y")
+
+    @property
+    def is_overdue(self) -> bool:
+        """True once the occurrence's due date has passed."""
+        return datetime.now() > self.due_date
+
+    def __repr__(self) -> str:
+        """Occurrence representation for debugging."""
+        return f"<Occurrence({self.recurrence_id}, {self.key})>"
+
+
+class RecurrenceCache(TTLCache):
+    """
+    Each user's expanded occurrences for one window. Entries are dropped
+    once a change to one of the user's rules commits in this process.
+    """
+
+    config_prefix = "RECURRENCE_CACHE"
+
+    def get(self, user_id: int, start: datetime, end: datetime) -> list[Occurrence]:
+        """Return the user's occurrences in [start, end), expanding them on a miss."""
+        now = monotonic()
+        occurrences = self.lookup(user_id, now, tag=(start, end))
+        if occurrences is None:
+            occurrences = expand(user_id, start, end)
+            self.store(user_id, occurrences, now, tag=(start, end))
+        return occurrences
+
+
+# Shared per-process cache
+recurrence_cache = RecurrenceCache()
+
+
+@event.listens_for(RecurringTask, "after_insert")
+@event.listens_for(RecurringTask, "after_update")
+@event.listens_for(RecurringTask, "after_delete")
+def _collect_changed_recurrences(mapper, connection, target: RecurringTask) -> None:
+    """Remember whose rules a flush changed until the transaction commits."""
+    object_session(target).info.setdefault("changed_recurrences", set()).add(target.user_id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_changed_recurrences(session) -> None:
+    """Invalidate the owners' expansions once their rule changes are committed."""
+    for user_id in session.info.pop("changed_recurrences", ()):
+        recurrence_cache.invalidate(user_id)
+
+
+def expand(user_id: int, start: datetime, end: datetime) -> list[Occurrence]:
+    """Expand all of a user's rules over [start, end), ordered by due date."""
+    occurrences = []
+    for recurring in db.session.scalars(
+        select(RecurringTask).where(RecurringTask.user_id == user_id)
+    ):
+        rule = Rule(recurring.rule, recurring.starts_at)
+        occurrences.extend(Occurrence(recurring, when) for when in rule.between(start, end))
+    return sorted(occurrences, key=lambda occurrence: occurrence.due_date)
+
+
+def pending_occurrences(user_id: int, start: datetime, end: datetime) -> list[Occurrence]:
+    """The user's occurrences in [start, end) that haven't been materialized."""
+    occurrences = recurrence_cache.get(user_id, start, end)
+    if not occurrences:
+        return []
+
+    # Stored occurrences are read through the (recurrence_id, occurrence) index
+    stored = set(
+        db.session.execute(
+            select(Task.recurrence_id, Task.occurrence).where(
+                Task.recurrence_id.in_({occurrence.recurrence_id for occurrence in occurrences}),
+                Task.occurrence >= start,
+                Task.occurrence < end,
+            )
+        ).all()
+    )
+    return [
+        occurrence
+        for occurrence in occurrences
+        if (occurrence.recurrence_id, occurrence.due_date) not in stored
+    ]
+
+
+def materialize(recurring: RecurringTask, when: datetime, completed: bool = True) -> Task | None:
+    """
+    Store one occurrence as a task and count it in the stats.
+    Returns None if it was already stored. Caller commits.
+    """
+    task = Task(
+        title=recurring.title,
+        description=recurring.description,
+        priority=recurring.priority,
+        category_id=recurring.category_id,
+        due_date=when,
+        user_id=recurring.user_id,
+        recurrence_id=recurring.id,
+        occurrence=when,
+    )
+    if completed:
+        task.mark_complete()
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(task)
+    except IntegrityError:
+        return None
+
+    record_task_change(recurring.user_id, None, task_facets(task))
+    return task
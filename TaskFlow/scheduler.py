@@ -0,0 +1,208 @@
+"""
+Due-date reminders:
+In-process scheduler that sleeps until the next task deadline and records
+reminder events for tasks that have just become overdue.
+"""
+
+import click
+import heapq
+import logging
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, tuple_
+from models import db, Task, TaskReminder
+from shards import shard_names, using_shard
+from stats import UPSERT_INSERTS
+
+
+logger = logging.getLogger(__name__)
+
+
+def record_reminders(since: datetime, until: datetime) -> int:
+    """
+    Record reminders for tasks whose deadline fell in (since, until].
+    Uses the (completed, due_date) index and inserts in one batch. Caller commits.
+    """
+    due = db.session.execute(
+        select(Task.id, Task.user_id, Task.due_date).where(
+            Task.is_overdue, Task.due_date > since, Task.due_date <= until
+        )
+    ).all()
+    if not due:
+        return 0
+
+    table = TaskReminder.__table__
+    reminders = [
+        {"task_id": task_id, "user_id": user_id, "due_date": due_date}
+        for task_id, user_id, due_date in due
+    ]
+    dialect = db.session.get_bind(TaskReminder).dialect.name
+    if dialect in UPSERT_INSERTS:
+        # Deadlines another scheduler already recorded hit the unique key and
+        # are skipped, so concurrent schedulers never fail on each other
+        inserted = db.session.execute(
+            UPSERT_INSERTS[dialect](table)
+            .on_conflict_do_nothing(index_elements=[table.c.task_id, table.c.due_date])
+            .returning(table.c.id),
+            reminders,
+        ).all()
+        return len(inserted)
+
+    # No portable ON CONFLICT; skip deadlines another scheduler already recorded
+    keys = [(task_id, due_date) for task_id, _, due_date in due]
+    seen = set(
+        db.session.execute(
+            select(TaskReminder.task_id, TaskReminder.due_date).where(
+                tuple_(TaskReminder.task_id, TaskReminder.due_date).in_(keys)
+            )
+        ).all()
+    )
+    rows = [row for row in reminders if (row["task_id"], row["due_date"]) not in seen]
+    if rows:
+        db.session.execute(table.insert(), rows)
+    return len(rows)
+
+
+class ReminderScheduler:
+    """
+    Keeps a min-heap of upcoming deadlines inside a look-ahead horizon and
+    wakes when the earliest one passes, instead of polling the tasks table.
+    Each wake records every deadline crossed since the previous wake, so
+    tasks scheduled by other processes are still picked up; `max_sleep`
+    bounds how late those can be noticed.
+    """
+
+    def __init__(self) -> None:
+        self.horizon = timedelta(hours=24)
+        self.max_sleep = 300.0
+        self.catchup = timedelta(hours=24)
+        self._app: Flask | None = None
+        self._heap: list[tuple[datetime, int]] = []
+        self._loaded_until: datetime | None = None
+        self._last_checked: datetime | None = None
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def init_app(self, app: Flask) -> None:
+        """Read scheduler settings and start it if enabled."""
+        self.horizon = timedelta(hours=app.config.get("REMINDER_HORIZON_HOURS", 24))
+        self.max_sleep = app.config.get("REMINDER_MAX_SLEEP", 300)
+        self.catchup = timedelta(hours=app.config.get("REMINDER_CATCHUP_HOURS", 24))
+        app.extensions["reminder_scheduler"] = self
+        if app.config.get("REMINDER_SCHEDULER_ENABLED"):
+            self.start(app)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app: Flask) -> None:
+        """Run the scheduler loop in a daemon thread."""
+        if self.running:
+            return
+        self._app = app
+        self._stop.clear()
+        self._thread = Thread(target=self.run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the loop to exit and wait for it."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def schedule(self, task_id: int, due_date: datetime | None) -> None:
+        """Add a deadline to the heap if it falls inside the loaded horizon."""
+        if due_date is None or not self.running:
+            return
+        with self._lock:
+            if self._loaded_until is None or due_date > self._loaded_until:
+                # A later refill will load it
+                return
+            heapq.heappush(self._heap, (due_date, task_id))
+        self._wake.set()
+
+    def run(self) -> None:
+        """Scheduler loop; blocks until `stop` is called."""
+        app = self._app or current_app._get_current_object()
+        self._last_checked = datetime.now() - self.catchup
+
+        while not self._stop.is_set():
+            now = datetime.now()
+            with app.app_context():
+                self._tick(now)
+            self._wake.clear()
+            self._wake.wait(self._seconds_until_next(datetime.now()))
+
+    def _tick(self, now: datetime) -> None:
+        """Record crossed deadlines, then refill the heap if the horizon ran out."""
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+
+        # Every shard is swept; the window only advances once all of them succeed
+        swept = True
+        for shard in shard_names():
+            with using_shard(shard):
+                try:
+                    recorded = record_reminders(self._last_checked, now)
+                    db.session.commit()
+                    if recorded:
+                        logger.info("Recorded %d due-date reminders", recorded)
+                except Exception:
+                    db.session.rollback()
+                    swept = False
+                    logger.exception("Recording due-date reminders failed")
+        if swept:
+            self._last_checked = now
+
+        if self._loaded_until is None or self._loaded_until <= now:
+            self._refill(now)
+        db.session.remove()
+
+    def _refill(self, now: datetime) -> None:
+        """Load pending deadlines inside the next horizon window."""
+        until = now + self.horizon
+        upcoming = []
+        for shard in shard_names():
+            with using_shard(shard):
+                upcoming += db.session.execute(
+                    select(Task.due_date, Task.id).where(
+                        Task.completed.is_(False), Task.due_date > now, Task.due_date <= until
+                    )
+                ).all()
+        with self._lock:
+            self._heap = [(due_date, task_id) for due_date, task_id in upcoming]
+            heapq.heapify(self._heap)
+            self._loaded_until = until
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        """Time to sleep until the next deadline, refill or safety wake."""
+        wake_at = now + timedelta(seconds=self.max_sleep)
+        with self._lock:
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            if self._loaded_until is not None:
+                wake_at = min(wake_at, self._loaded_until)
+        return max((wake_at - now).total_seconds(), 0.0)
+
+
+# Shared per-process scheduler
+reminder_scheduler = ReminderScheduler()
+
+
+@click.command("run-reminders")
+@with_appcontext
+def run_reminders_command() -> None:
+    """Run the due-date reminder scheduler in the foreground."""
+    click.echo("Reminder scheduler running. Press CTRL+C to quit.")
+    try:
+        reminder_scheduler.run()
+    except KeyboardInterrupt:
+        pass
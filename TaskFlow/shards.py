@@ -0,0 +1,423 @@
+"""
+Per-tenant sharding:
+Optional mode where each user's tasks live in one of several shard
+databases (SHARDS). The main database keeps users and the shard directory,
+each request's session is routed to the signed-in user's shard, and users
+can be moved between shards to even out the load.
+"""
+
+import click
+import math
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from time import monotonic
+from flask import Flask, current_app, g, request
+from flask.cli import with_appcontext
+from flask_login import current_user
+from sqlalchemy import Connection, Engine, delete, func, insert, select
+from werkzeug.wrappers import Response
+from cache import TTLCache
+from models import db, Task, User, UserShard, UserTaskStat
+
+
+# Shard name for the main database, where users without a directory entry live
+MAIN_SHARD = "main"
+
+# Tenant tables in the order a user's rows are deleted; copies run the other way
+DELETE_ORDER = (
+    "task_reminders", "tasks", "archived_tasks", "recurring_tasks",
+    "categories", "user_task_stats", "task_tombstones",
+)
+
+# Rows read per round trip when copying a user's tasks
+COPY_BATCH_SIZE = 1000
+
+
+class ShardDirectory(TTLCache):
+    """
+    Users' directory entries. Entries are dropped when a user is moved by
+    this process; other processes converge once the TTL expires, which is
+    why moves wait for it.
+    """
+
+    config_prefix = "SHARD_DIRECTORY"
+
+    def __init__(self, max_size: int = 4096, ttl: float = 30.0) -> None:
+        super().__init__(max_size, ttl)
+        self.shards: dict[str, str] = {}
+
+    def init_app(self, app: Flask) -> None:
+        """Read the shard list and cache limits; route requests if sharding is on."""
+        super().init_app(app)
+        self.shards = app.config.get("SHARDS", {})
+        if self.shards:
+            app.before_request(route_request)
+
+    def get(self, user_id: int) -> tuple[str, bool]:
+        """Return a user's (shard, moving), reading the directory on a miss."""
+        now = monotonic()
+        entry = self.lookup(user_id, now)
+        if entry is not None:
+            return entry
+
+        row = db.session.execute(
+            select(UserShard.shard, UserShard.moving).where(UserShard.user_id == user_id)
+        ).first()
+        entry = (row.shard, row.moving) if row else (MAIN_SHARD, False)
+        self.store(user_id, entry, now)
+        return entry
+
+
+# Shared per-process directory cache
+shard_directory = ShardDirectory()
+
+
+def bind_key(shard: str) -> str | None:
+    """SQLALCHEMY_BINDS key of a shard; the main database has none."""
+    return None if shard == MAIN_SHARD else shard
+
+
+def engine_for(shard: str) -> Engine:
+    """Engine of a shard."""
+    return db.engines[bind_key(shard)]
+
+
+def shard_names() -> list[str]:
+    """Every database that can hold tenant data, the main one first."""
+    return [MAIN_SHARD, *current_app.config.get("SHARDS", {})]
+
+
+def current_shard() -> str:
+    """Shard the session is routed to."""
+    return g.get("shard") or MAIN_SHARD
+
+
+@contextmanager
+def using_shard(shard: str) -> Iterator[None]:
+    """
+    Route the session to `shard` inside the block, for jobs that walk every
+    shard. The session is closed on the way in and out, so rows from
+    different shards never share an identity map.
+    """
+    previous = g.get("shard")
+    db.session.close()
+    g.shard = bind_key(shard)
+    try:
+        yield
+    finally:
+        db.session.close()
+        g.shard = previous
+
+
+def route_request() -> Response | None:
+    """Point this request's session at the signed-in user's shard."""
+    if request.endpoint == "static" or not current_user.is_authenticated:
+        return None
+    shard, moving = shard_directory.get(current_user.id)
+    if moving:
+        return Response(
+            "Your tasks are being moved. Please try again shortly.",
+            status=503,
+            headers={"Retry-After": str(math.ceil(shard_directory.ttl))},
+        )
+    g.shard = bind_key(shard)
+    return None
+
+
+def assign_shard(user_id: int) -> str | None:
+    """
+    Place a new user on the configured shard with the fewest users.
+    Returns the shard, or None when sharding is off. Caller commits.
+    """
+    shards = current_app.config.get("SHARDS", {})
+    if not shards:
+        return None
+    counts = dict(
+        db.session.execute(select(UserShard.shard, func.count()).group_by(UserShard.shard)).all()
+    )
+    shard = min(shards, key=lambda name: counts.get(name, 0))
+    db.session.add(UserShard(user_id=user_id, shard=shard, moving=False))
+    return shard
+
+
+# Moving users
+
+
+def delete_user_rows(conn: Connection, user_id: int) -> None:
+    """Delete all of a user's tenant rows from one database."""
+    for name in DELETE_ORDER:
+        table = db.metadata.tables[name]
+        conn.execute(delete(table).where(table.c.user_id == user_id))
+
+
+def copy_user_rows(source: Connection, dest: Connection, user_id: int) -> None:
+    """
+    Copy a user's tenant rows between databases. Rows get new ids in the
+    destination, and references to categories, recurring tasks and tasks
+    are rewritten to match. Archived tasks take their ids from the
+    destination's tasks table, so restoring one never collides with a task.
+    """
+    tables = db.metadata.tables
+
+    def partitions(name: str) -> Iterator[list[dict]]:
+        table = tables[name]
+        result = source.execution_options(yield_per=COPY_BATCH_SIZE).execute(
+            select(table).where(table.c.user_id == user_id)
+        )
+        for partition in result.partitions():
+            yield [dict(row._mapping) for row in partition]
+
+    def copy(
+        name: str,
+        remap: Callable[[dict], None] | None = None,
+        keep: Callable[[dict], bool] | None = None,
+        allocate: Callable[[list[dict]], list[int]] | None = None,
+    ) -> dict[int, int]:
+        table = tables[name]
+        new_ids: dict[int, int] = {}
+        for rows in partitions(name):
+            if keep:
+                rows = [row for row in rows if keep(row)]
+                if not rows:
+                    continue
+            if remap:
+                for row in rows:
+                    remap(row)
+            if "id" not in table.c:
+                dest.execute(insert(table), rows)
+                continue
+            old = [row.pop("id") for row in rows]
+            if allocate:
+                new = allocate(rows)
+                dest.execute(insert(table), [row | {"id": new_id} for row, new_id in zip(rows, new)])
+            else:
+                new = dest.execute(
+                    insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+                ).scalars()
+            new_ids.update(zip(old, new))
+        return new_ids
+
+    def task_ids(rows: list[dict]) -> list[int]:
+        # Insert and delete placeholder tasks; their ids are never handed out again
+        tasks = tables["tasks"]
+        placeholders = [
+            {key: value for key, value in row.items() if key in tasks.c}
+            | {"completed": True, "recurrence_id": None, "occurrence": None}
+            for row in rows
+        ]
+        ids = list(dest.execute(
+            insert(tasks).returning(tasks.c.id, sort_by_parameter_order=True), placeholders
+        ).scalars())
+        dest.execute(delete(tasks).where(tasks.c.id.in_(ids)))
+        return ids
+
+    categories = copy("categories")
+    recurrences = copy(
+        "recurring_tasks", lambda row: row.update(category_id=categories[row["category_id"]])
+    )
+
+    def remap_task(row: dict) -> None:
+        row["category_id"] = categories[row["category_id"]]
+        if row["recurrence_id"] is not None:
+            row["recurrence_id"] = recurrences.get(row["recurrence_id"])
+
+    tasks = copy("tasks", remap_task)
+    copy("archived_tasks", remap_task, allocate=task_ids)
+    # Reminders of tasks that are gone would fire for whichever task got the id
+    copy(
+        "task_reminders",
+        lambda row: row.update(task_id=tasks[row["task_id"]]),
+        keep=lambda row: row["task_id"] in tasks,
+    )
+    copy("user_task_stats")
+    # Tombstones are left behind: sync cursors name their shard, so clients
+    # of a moved user start over with a full sync
+
+
+def locate(user_id: int) -> str:
+    """Read a user's shard from the directory, bypassing the cache."""
+    return db.session.scalar(select(UserShard.shard).where(UserShard.user_id == user_id)) or MAIN_SHARD
+
+
+def set_directory(user_id: int, shard: str, moving: bool) -> None:
+    """Write a user's directory entry and commit."""
+    entry = db.session.get(UserShard, user_id)
+    if shard == MAIN_SHARD and not moving:
+        if entry is not None:
+            db.session.delete(entry)
+    elif entry is None:
+        db.session.add(UserShard(user_id=user_id, shard=shard, moving=moving))
+    else:
+        entry.shard, entry.moving = shard, moving
+    db.session.commit()
+    shard_directory.invalidate(user_id)
+
+
+def move_user(user_id: int, target: str, wait: float) -> bool:
+    """
+    Move a user's data to another shard. Returns False if it is already there.
+    The user is marked as moving and requests get 503 while `wait` seconds
+    pass, so no process still writes to the old shard from a cached entry.
+    The copy goes into one destination transaction, then the directory is
+    switched and the old rows are deleted; rerunning an interrupted move is safe.
+    """
+    source = locate(user_id)
+    if source == target:
+        return False
+
+    set_directory(user_id, source, moving=True)
+    time.sleep(wait)
+    try:
+        with engine_for(target).begin() as dest, engine_for(source).connect() as src:
+            # Clear rows left by an interrupted move
+            delete_user_rows(dest, user_id)
+            copy_user_rows(src, dest, user_id)
+    except Exception:
+        set_directory(user_id, source, moving=False)
+        raise
+
+    set_directory(user_id, target, moving=False)
+    with engine_for(source).begin() as conn:
+        delete_user_rows(conn, user_id)
+
+    # Ids changed: drop cached expansions and have open dashboards reload
+    extensions = current_app.extensions
+    if "recurrence_cache" in extensions:
+        extensions["recurrence_cache"].invalidate(user_id)
+    if "event_hub" in extensions:
+        extensions["event_hub"].publish(user_id, "resync", {})
+    return True
+
+
+# Rebalancing
+
+
+def shard_loads() -> dict[str, dict[int, int]]:
+    """Every shard's users and their task counts, read from the stats counters."""
+    directory = dict(db.session.execute(select(UserShard.user_id, UserShard.shard)).all())
+    loads: dict[str, dict[int, int]] = {name: {} for name in shard_names()}
+
+    # Users without an entry live in the main database, with or without tasks
+    for user_id in db.session.scalars(select(User.id)):
+        if user_id not in directory:
+            loads[MAIN_SHARD][user_id] = 0
+    for user_id, shard in directory.items():
+        loads.setdefault(shard, {})[user_id] = 0
+
+    for shard in shard_names():
+        with using_shard(shard):
+            counts = db.session.execute(
+                select(UserTaskStat.user_id, func.sum(UserTaskStat.count))
+                .where(UserTaskStat.dimension == "status")
+                .group_by(UserTaskStat.user_id)
+            ).all()
+        for user_id, count in counts:
+            if user_id in loads[shard]:
+                loads[shard][user_id] = count
+    return loads
+
+
+def plan_rebalance(
+    loads: dict[str, dict[int, int]], shards: list[str], max_moves: int
+) -> list[tuple[int, str, str, int]]:
+    """
+    Plan moves as (user_id, from, to, tasks). Users still in the main
+    database go to the lightest shard first; then the heaviest user whose
+    move narrows the gap between the most and least loaded shards is moved,
+    until no move helps or `max_moves` is reached.
+    """
+    users = {name: dict(loads.get(name, {})) for name in shards}
+    totals = {name: sum(users[name].values()) for name in shards}
+    moves = []
+
+    for user_id, weight in sorted(loads.get(MAIN_SHARD, {}).items(), key=lambda item: -item[1]):
+        target = min(totals, key=totals.get)
+        moves.append((user_id, MAIN_SHARD, target, weight))
+        users[target][user_id] = weight
+        totals[target] += weight
+
+    for _ in range(max_moves):
+        heavy = max(totals, key=totals.get)
+        light = min(totals, key=totals.get)
+        gap = totals[heavy] - totals[light]
+        candidates = [(weight, user_id) for user_id, weight in users[heavy].items() if 0 < weight < gap]
+        if not candidates:
+            break
+        weight, user_id = max(candidates)
+        moves.append((user_id, heavy, light, weight))
+        users[light][user_id] = users[heavy].pop(user_id)
+        totals[heavy] -= weight
+        totals[light] += weight
+    return moves
+
+
+# Commands
+
+
+def require_shards() -> list[str]:
+    """Configured shard names, or a CLI error if sharding is off."""
+    shards = list(current_app.config.get("SHARDS", {}))
+    if not shards:
+        raise click.ClickException("Sharding is off; set SHARDS first.")
+    return shards
+
+
+@click.command("shard-status")
+@with_appcontext
+def shard_status_command() -> None:
+    """Show how many users and tasks each shard holds."""
+    loads = shard_loads()
+    for shard in shard_names():
+        with using_shard(shard):
+            tasks = db.session.scalar(select(func.count()).select_from(Task))
+        click.echo(f"{shard}: {len(loads.get(shard, {}))} users, {tasks} tasks")
+
+
+@click.command("shard-move")
+@click.option("--user-id", type=int, required=True, help="User to move.")
+@click.option("--to", "target", required=True, help="Destination shard (or 'main').")
+@click.option("--wait/--no-wait", default=True, help="Wait for directory caches to expire (default: on).")
+@with_appcontext
+def shard_move_command(user_id: int, target: str, wait: bool) -> None:
+    """Move one user's tasks to another shard."""
+    if target not in shard_names():
+        raise click.ClickException(f"Unknown shard '{target}'.")
+    if db.session.get(User, user_id) is None:
+        raise click.ClickException(f"No user with id {user_id}.")
+    moved = move_user(user_id, target, shard_directory.ttl if wait else 0)
+    click.echo(f"Moved user {user_id} to {target}." if moved else f"User {user_id} is already on {target}.")
+
+
+@click.command("shard-rebalance")
+@click.option("--max-moves", type=int, default=100, help="Limit on moves between shards.")
+@click.option("--dry-run", is_flag=True, help="Print the plan without moving anyone.")
+@click.option("--wait/--no-wait", default=True, help="Wait for directory caches to expire (default: on).")
+@with_appcontext
+def shard_rebalance_command(max_moves: int, dry_run: bool, wait: bool) -> None:
+    """Even out task counts across shards by moving users."""
+    moves = plan_rebalance(shard_loads(), require_shards(), max_moves)
+    if not moves:
+        click.echo("Shards are balanced.")
+        return
+
+    # Every move marks its user first, so one wait covers the whole plan
+    if not dry_run:
+        for user_id, source, _, _ in moves:
+            set_directory(user_id, source, moving=True)
+        time.sleep(shard_directory.ttl if wait else 0)
+
+    done = 0
+    try:
+        for user_id, source, target, weight in moves:
+            click.echo(f"User {user_id} ({weight} tasks): {source} -> {target}")
+            if not dry_run:
+                move_user(user_id, target, 0)
+            done += 1
+    finally:
+        # Users the plan didn't get to are released where they are
+        if not dry_run:
+            for user_id, _, _, _ in moves[done:]:
+                set_directory(user_id, locate(user_id), moving=False)
+    if not dry_run:
+        click.echo(f"Moved {len(moves)} users.")
@@ -31,4 +31,70 @@ document.addEventListener("DOMContentLoaded", function() {
     const dateInputs = document.querySelectorAll("input[type='datetime-local']");
     const now = new Date().toISOString().slice(0, 16);
     dateInputs.forEach(input => input.min = now);
+
+
+    // Live updates: patch the dashboard from the server's event stream
+    const taskList = document.getElementById("task-list");
+    if (taskList && window.EventSource) {
+        const filters = new URLSearchParams(window.location.search);
+
+        // Does a task still belong in the list under the current filters?
+        const matches = task => {
+            const status = filters.get("status");
+            if (status === "pending" && task.completed) return false;
+            if (status === "completed" && !task.completed) return false;
+            if (status === "overdue" && !task.overdue) return false;
+            if (filters.get("priority") && filters.get("priority") !== task.priority) return false;
+            if (filters.get("category") && filters.get("category") !== String(task.category)) return false;
+            return true;
+        };
+
+        const updateCounts = stats => {
+            document.querySelectorAll("[data-stat]").forEach(el => {
+                el.textContent = stats[el.dataset.stat] ?? 0;
+            });
+            document.querySelectorAll("[data-facet]").forEach(el => {
+                const [dimension, value] = el.dataset.facet.split(":");
+                el.textContent = stats[dimension][value] ?? 0;
+            });
+        };
+
+        const removeCard = id => {
+            const card = taskList.querySelector(`[data-task-id="${id}"]`);
+            if (card) card.remove();
+        };
+
+        const upsertCard = event => {
+            const task = JSON.parse(event.data);
+            updateCounts(task.stats);
+            if (!matches(task)) {
+                removeCard(task.id);
+                return;
+            }
+
+            const template = document.createElement("template");
+            template.innerHTML = task.html.trim();
+            const card = template.content.firstElementChild;
+            const current = taskList.querySelector(`[data-task-id="${task.id}"]`);
+            if (current) {
+                current.replaceWith(card);
+            } else {
+                const empty = document.getElementById("empty-state");
+                if (empty) empty.remove();
+                taskList.prepend(card);
+            }
+        };
+
+        const source = new EventSource(taskList.dataset.eventsUrl);
+        ["task.created", "task.updated", "task.completed"].forEach(type => {
+            source.addEventListener(type, upsertCard);
+        });
+        source.addEventListener("task.deleted", event => {
+            const task = JSON.parse(event.data);
+            updateCounts(task.stats);
+            removeCard(task.id);
+        });
+        // Events were dropped while this tab lagged behind; start fresh
+        source.addEventListener("resync", () => window.location.reload());
+    }
 });
\ No newline at end of file
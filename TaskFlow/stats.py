@@ -0,0 +1,187 @@
+"""
+Per-user task statistics:
+Maintains the materialized user_task_stats counters and category task
+counts on every task write, and rebuilds them from the tasks table when needed.
+"""
+
+import click
+from collections import Counter
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from categories import user_categories
+from models import db, Category, Task, UserTaskStat
+from shards import locate, shard_names, using_shard
+
+
+# Counter dimensions tracked for every task; category counts live on the categories table
+DIMENSIONS = ("status", "priority", "category")
+
+# INSERT ... ON CONFLICT DO UPDATE constructs by dialect name
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def task_facets(task: Task | None) -> list[tuple[str, str]]:
+    """Return the (dimension, value) pairs a task counts towards."""
+    if task is None:
+        return []
+    return [
+        ("status", "completed" if task.completed else "pending"),
+        ("priority", task.priority),
+        ("category", task.category_id),
+    ]
+
+
+def record_task_change(
+    user_id: int,
+    before: list[tuple[str, str]] | None,
+    after: list[tuple[str, str]] | None,
+) -> None:
+    """
+    Move counters from a task's old facets to its new ones.
+    Pass `before=None` for a created task and `after=None` for a deleted one.
+    Runs inside the caller's transaction, so it commits or rolls back with it.
+    """
+    deltas: Counter = Counter()
+    for facet in before or []:
+        deltas[facet] -= 1
+    for facet in after or []:
+        deltas[facet] += 1
+    apply_deltas(user_id, deltas)
+
+
+def apply_deltas(user_id: int, deltas: Counter) -> None:
+    """Add each delta to its counter row, creating missing rows."""
+    counters = []
+    for (dimension, value), delta in deltas.items():
+        if delta == 0:
+            continue
+
+        # Category facets are category ids; their count is on the category row
+        if dimension == "category":
+            db.session.execute(
+                update(Category)
+                .where(Category.id == value, Category.user_id == user_id)
+                .values(task_count=Category.task_count + delta)
+            )
+            continue
+        counters.append({"user_id": user_id, "dimension": dimension, "value": value, "count": delta})
+
+    if counters:
+        upsert_counters(counters)
+
+
+def upsert_counters(counters: list[dict]) -> None:
+    """
+    Add counts to user_task_stats rows in one upsert, so two transactions
+    creating the same counter both land instead of one failing on the key.
+    """
+    table = UserTaskStat.__table__
+    dialect = db.session.get_bind(UserTaskStat).dialect.name
+    if dialect not in UPSERT_INSERTS:
+        # No portable upsert; update, then insert the rows that didn't exist
+        for row in counters:
+            result = db.session.execute(
+                update(UserTaskStat)
+                .where(
+                    UserTaskStat.user_id == row["user_id"],
+                    UserTaskStat.dimension == row["dimension"],
+                    UserTaskStat.value == row["value"],
+                )
+                .values(count=UserTaskStat.count + row["count"])
+            )
+            if result.rowcount == 0:
+                db.session.execute(table.insert(), row)
+        return
+
+    stmt = UPSERT_INSERTS[dialect](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.dimension, table.c.value],
+        set_={"count": table.c.count + stmt.excluded["count"]},
+    )
+    db.session.execute(stmt, counters)
+
+
+def get_user_stats(user_id: int) -> dict:
+    """Read a user's counters; cost depends on distinct values, not task count."""
+    stats: dict = {dimension: {} for dimension in DIMENSIONS}
+    rows = db.session.execute(
+        select(UserTaskStat.dimension, UserTaskStat.value, UserTaskStat.count).where(
+            UserTaskStat.user_id == user_id, UserTaskStat.count > 0
+        )
+    )
+    for dimension, value, count in rows:
+        stats.setdefault(dimension, {})[value] = count
+
+    stats["categories"] = user_categories(user_id)
+    stats["category"] = {name: count for _, name, count in stats["categories"]}
+
+    stats["total"] = sum(stats["status"].values())
+    stats["completed"] = stats["status"].get("completed", 0)
+    stats["pending"] = stats["status"].get("pending", 0)
+
+    # Overdue depends on the clock, so it is an indexed count instead of a counter
+    stats["overdue"] = db.session.scalar(
+        select(func.count())
+        .select_from(Task)
+        .where(
+            Task.user_id == user_id,
+            Task.is_overdue,
+        )
+    )
+    return stats
+
+
+def rebuild_stats(user_id: int | None = None) -> int:
+    """
+    Recompute counters and category task counts from the tasks table for
+    one user or everyone. Returns the number of rows written. Caller commits.
+    """
+    counters: dict[int, Counter] = {}
+    query = select(
+        Task.user_id, Task.completed, Task.priority, func.count()
+    ).group_by(Task.user_id, Task.completed, Task.priority)
+
+    clear = delete(UserTaskStat)
+    recount = update(Category).values(
+        task_count=select(func.count())
+        .where(Task.user_id == Category.user_id, Task.category_id == Category.id)
+        .scalar_subquery()
+    )
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+        clear = clear.where(UserTaskStat.user_id == user_id)
+        recount = recount.where(Category.user_id == user_id)
+
+    for owner, completed, priority, count in db.session.execute(query):
+        counter = counters.setdefault(owner, Counter())
+        counter[("status", "completed" if completed else "pending")] += count
+        counter[("priority", priority)] += count
+
+    db.session.execute(clear)
+    rows = [
+        {"user_id": owner, "dimension": dimension, "value": value, "count": count}
+        for owner, counter in counters.items()
+        for (dimension, value), count in counter.items()
+    ]
+    if rows:
+        db.session.execute(UserTaskStat.__table__.insert(), rows)
+    recounted = db.session.execute(recount.execution_options(synchronize_session=False))
+    return len(rows) + recounted.rowcount
+
+
+@click.command("rebuild-stats")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user.")
+@with_appcontext
+def rebuild_stats_command(user_id: int | None) -> None:
+    """Rebuild user_task_stats and category counts from the tasks table."""
+    written = 0
+    for shard in [locate(user_id)] if user_id is not None else shard_names():
+        with using_shard(shard):
+            try:
+                written += rebuild_stats(user_id)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    click.echo(f"Rebuilt {written} counter rows.")
@@ -0,0 +1,176 @@
+"""
+Delta sync API:
+Lets clients that keep a local copy of their tasks fetch only what changed
+since their last sync: updated tasks in (updated_at, id) order plus
+tombstones for deleted ones.
+"""
+
+import base64
+import binascii
+import click
+import json
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
+from flask.cli import with_appcontext
+from flask_login import login_required, current_user
+from sqlalchemy import delete, select, tuple_
+from werkzeug.wrappers import Response
+from export import EXPORT_COLUMNS, format_value
+from models import db, Category, Task, TaskTombstone
+from shards import MAIN_SHARD, current_shard, shard_names, using_shard
+
+
+sync = Blueprint("sync", __name__)
+
+# Task fields sent to clients; version lets them detect stale local edits
+SYNC_COLUMNS = (*EXPORT_COLUMNS, Task.version)
+
+# Position in both change streams: (updated_at, id) and (deleted_at, id)
+Key = tuple[datetime, int]
+
+# Decoded cursor: both positions and the shard they refer to
+Cursor = tuple[Key, Key, str]
+
+
+class CursorError(ValueError):
+    """Raised for cursors that can't be decoded."""
+
+
+def encode_cursor(tasks: Key, deleted: Key, shard: str) -> str:
+    """Pack both stream positions and their shard into an opaque URL-safe token."""
+    payload = [[tasks[0].isoformat(), tasks[1]], [deleted[0].isoformat(), deleted[1]], shard]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Unpack a token made by encode_cursor(); older tokens have no shard."""
+    try:
+        (task_ts, task_id), (deleted_ts, deleted_id), *shard = json.loads(
+            base64.urlsafe_b64decode(cursor)
+        )
+        return (
+            (datetime.fromisoformat(task_ts), int(task_id)),
+            (datetime.fromisoformat(deleted_ts), int(deleted_id)),
+            str(shard[0]) if shard else MAIN_SHARD,
+        )
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise CursorError("Invalid cursor.") from e
+
+
+def changes_since(
+    user_id: int,
+    tasks_after: Key | None,
+    deleted_after: Key | None,
+    limit: int,
+    skew: timedelta,
+) -> dict:
+    """
+    One page of a user's changes after the given positions.
+    Each stream is read in keyset order from its (user_id, time, id) index.
+    """
+    now = datetime.now()
+    query = (
+        select(*SYNC_COLUMNS)
+        .join(Category, Task.category_id == Category.id)
+        .where(Task.user_id == user_id)
+        .order_by(Task.updated_at, Task.id)
+        .limit(limit + 1)
+    )
+    if tasks_after is not None:
+        query = query.where(tuple_(Task.updated_at, Task.id) > tasks_after)
+    rows = db.session.execute(query).all()
+
+    # A first sync takes the full task list, so only later deletions matter
+    if deleted_after is None:
+        deleted_after = (now - skew, 0)
+    tombstones = db.session.execute(
+        select(TaskTombstone.id, TaskTombstone.task_id, TaskTombstone.deleted_at)
+        .where(
+            TaskTombstone.user_id == user_id,
+            tuple_(TaskTombstone.deleted_at, TaskTombstone.id) > deleted_after,
+        )
+        .order_by(TaskTombstone.deleted_at, TaskTombstone.id)
+        .limit(limit + 1)
+    ).all()
+
+    tasks_more, deleted_more = len(rows) > limit, len(tombstones) > limit
+    rows, tombstones = rows[:limit], tombstones[:limit]
+
+    # A stream read to the end moves to `skew` behind the clock: writes still
+    # committing may carry slightly older timestamps, so clients see the
+    # newest rows again rather than miss a late one
+    safe = (now - skew, 0)
+    if tasks_more:
+        task_key = (rows[-1].updated_at, rows[-1].id)
+    else:
+        task_key = max(tasks_after or (datetime.min, 0), safe)
+    if deleted_more:
+        deleted_key = (tombstones[-1].deleted_at, tombstones[-1].id)
+    else:
+        deleted_key = max(deleted_after, safe)
+
+    return {
+        "tasks": [
+            {key: format_value(value) for key, value in row._mapping.items()} for row in rows
+        ],
+        "deleted": [tombstone.task_id for tombstone in tombstones],
+        "cursor": encode_cursor(task_key, deleted_key, current_shard()),
+        "has_more": tasks_more or deleted_more,
+    }
+
+
+@sync.route("/api/changes")
+@login_required
+def changes() -> Response:
+    """Tasks changed and deleted since `cursor`; omit it for a full sync."""
+    config = current_app.config
+    limit = min(
+        request.args.get("limit", config.get("SYNC_PAGE_SIZE", 500), type=int),
+        config.get("SYNC_MAX_PAGE_SIZE", 1000),
+    )
+    if limit < 1:
+        return jsonify(error="limit must be positive."), 400
+
+    tasks_after = deleted_after = None
+    if request.args.get("cursor"):
+        try:
+            tasks_after, deleted_after, shard = decode_cursor(request.args["cursor"])
+        except CursorError as e:
+            return jsonify(error=str(e)), 400
+
+        # Tasks get new ids when their owner moves to another shard
+        if shard != current_shard():
+            return jsonify(error="Tasks were moved; sync again without a cursor."), 410
+
+        # Tombstones older than the retention window may be gone
+        retention = timedelta(days=config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+        if deleted_after[0] < datetime.now() - retention:
+            return jsonify(error="Cursor expired; sync again without a cursor."), 410
+
+    skew = timedelta(seconds=config.get("SYNC_CLOCK_SKEW_SECONDS", 2))
+    return jsonify(changes_since(current_user.id, tasks_after, deleted_after, limit, skew))
+
+
+def purge_tombstones(retention_days: int) -> int:
+    """Delete tombstones past the retention window. Caller commits."""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    result = db.session.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff))
+    return result.rowcount
+
+
+@click.command("purge-tombstones")
+@click.option("--days", type=int, default=None, help="Retention in days (default: config).")
+@with_appcontext
+def purge_tombstones_command(days: int | None) -> None:
+    """Delete sync tombstones older than the retention window."""
+    days = days if days is not None else current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+    purged = 0
+    for shard in shard_names():
+        with using_shard(shard):
+            try:
+                purged += purge_tombstones(days)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    click.echo(f"Purged {purged} tombstones older than {days} days.")
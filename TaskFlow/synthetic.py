@@ -0,0 +1,169 @@
+"""
+Synthetic data generator:
+Bulk-creates reproducible user and task populations for load testing.
+"""
+
+import click
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from models import db, make_excerpt, Category, User, Task
+from stats import rebuild_stats
+
+
+# Value distributions as (value, weight) pairs
+PRIORITIES = (("low", 30), ("medium", 50), ("high", 20))
+CATEGORIES = (
+    ("general", 30), ("work", 25), ("personal", 15), ("learning", 10),
+    ("shopping", 8), ("health", 7), ("finance", 5),
+)
+VERBS = ("Review", "Write", "Plan", "Call", "Fix", "Update", "Prepare", "Send", "Clean", "Read")
+NOUNS = ("report", "budget", "slides", "email", "bug", "notes", "invoice", "garden", "chapter", "schedule")
+
+# Share of tasks that are completed or have a due date
+COMPLETED_RATE = 0.55
+DUE_DATE_RATE = 0.6
+
+# Timestamps are spread over the year before a base date drawn from the
+# seed, not the clock, so a seed always yields the same rows
+BASE_DATE = datetime(2025, 1, 1)
+
+
+def weighted(rng: random.Random, choices: tuple[tuple[str, int], ...]) -> str:
+    """Pick a value according to its weight."""
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def make_task(
+    rng: random.Random, user_id: int, now: datetime, category_ids: dict[tuple[int, str], int]
+) -> dict:
+    """Build column values for one realistic-looking task."""
+    title = f"{rng.choice(VERBS)} {rng.choice(NOUNS)}"
+    created = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    completed = rng.random() < COMPLETED_RATE
+    due_date = None
+    if rng.random() < DUE_DATE_RATE:
+        due_date = created + timedelta(hours=rng.randint(1, 90 * 24))
+
+    description = f"{title} ({rng.randint(1, 9999)}) " + " ".join(rng.choices(NOUNS, k=rng.randint(3, 20)))
+
+    return {
+        "title": title,
+        "description": description,
+        "excerpt": make_excerpt(description),
+        "priority": weighted(rng, PRIORITIES),
+        "category_id": category_ids[(user_id, weighted(rng, CATEGORIES))],
+        "completed": completed,
+        "completed_at": created + (now - created) * rng.random() if completed else None,
+        "created_at": created,
+        "updated_at": created,
+        "due_date": due_date,
+        "user_id": user_id,
+    }
+
+
+def generate_population(
+    users: int,
+    tasks: int,
+    seed: int = 42,
+    prefix: str = "load",
+    password: str = "loadtest1",
+    batch_size: int = 5000,
+    progress=None,
+) -> tuple[int, int]:
+    """
+    Insert `users` users and `tasks` tasks spread over them with a skewed
+    (Zipf-like) distribution, so a few power users own many tasks.
+    The same seed always produces the same data.
+    """
+    rng = random.Random(seed)
+    now = BASE_DATE + timedelta(minutes=rng.randrange(365 * 24 * 60))
+
+    # Hash once; every synthetic user shares the password. Ids come back from
+    # the inserts, so existing users are never picked up by name
+    password_hash = generate_password_hash(password)
+    user_ids: list[int] = []
+    for start in range(0, users, batch_size):
+        batch = [
+            {
+                "username": f"{prefix}{i}",
+                "email": f"{prefix}{i}@example.com",
+                "password_hash": password_hash,
+                "first_name": "Load",
+                "last_name": f"User{i}",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(start, min(start + batch_size, users))
+        ]
+        user_ids += db.session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True), batch
+        ).all()
+        db.session.commit()
+        if progress:
+            progress("users", start + len(batch), users)
+
+    if not user_ids:
+        return 0, 0
+
+    # Every user gets the full category set up front
+    category_ids: dict[tuple[int, str], int] = {}
+    for start in range(0, len(user_ids), batch_size):
+        rows = db.session.execute(
+            insert(Category).returning(Category.id, Category.user_id, Category.name),
+            [
+                {"user_id": user_id, "name": name, "task_count": 0, "created_at": now}
+                for user_id in user_ids[start:start + batch_size]
+                for name, _ in CATEGORIES
+            ],
+        )
+        category_ids.update({(user_id, name): category_id for category_id, user_id, name in rows})
+    db.session.commit()
+
+    # Zipf-like ownership: the n-th user owns about 1/n^0.8 of the tasks
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, len(user_ids) + 1):
+        total += 1 / rank**0.8
+        cum_weights.append(total)
+
+    for start in range(0, tasks, batch_size):
+        size = min(batch_size, tasks - start)
+        owners = rng.choices(user_ids, cum_weights=cum_weights, k=size)
+        db.session.execute(insert(Task), [make_task(rng, owner, now, category_ids) for owner in owners])
+        db.session.commit()
+        if progress:
+            progress("tasks", start + size, tasks)
+
+    rebuild_stats()
+    db.session.commit()
+    return len(user_ids), tasks
+
+
+@click.command("seed-synthetic")
+@click.option("--users", type=int, default=1000, show_default=True)
+@click.option("--tasks", type=int, default=100000, show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True)
+@click.option("--prefix", default="load", show_default=True, help="Username prefix.")
+@click.option("--password", default="loadtest1", show_default=True)
+@click.option("--batch-size", type=int, default=5000, show_default=True)
+@with_appcontext
+def seed_synthetic_command(users, tasks, seed, prefix, password, batch_size) -> None:
+    """Bulk-create a synthetic population of users and tasks."""
+    if db.session.scalar(select(User.id).where(User.username == f"{prefix}0")):
+        raise click.ClickException(f"Users with prefix '{prefix}' already exist.")
+
+    def report(kind: str, done: int, total: int) -> None:
+        click.echo(f"  {kind}: {done}/{total}")
+
+    started = datetime.now()
+    created_users, created_tasks = generate_population(
+        users, tasks, seed, prefix, password, batch_size, progress=report
+    )
+    elapsed = (datetime.now() - started).total_seconds()
+    current_app.logger.info("Seeded %d users and %d tasks", created_users, created_tasks)
+    click.echo(f"Created {created_users} users and {created_tasks} tasks in {elapsed:.1f}s.")
@@ -3,16 +3,31 @@ Task management routes and logic.
 Implements CRUD operations with error handling and validation.
 """
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from collections.abc import Iterator
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from flask import current_app, get_flashed_messages, get_template_attribute, stream_template
 from flask_login import login_required, current_user
-from datetime import datetime
-from models import db, Task
+from datetime import datetime, timedelta
+from categories import DEFAULT_CATEGORY, category_id_for
+from events import event_hub
+from models import db, make_excerpt, ArchivedTask, RecurringTask, Task, TaskTombstone
+from recurrence import REPEAT_CHOICES, Occurrence, Rule, materialize, pending_occurrences
+from stats import get_user_stats, record_task_change, task_facets
+from scheduler import reminder_scheduler
+from sqlalchemy import case, delete, select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only, undefer
 from werkzeug.wrappers import Response
 
 
 tasks = Blueprint("tasks", __name__)
 
+# Columns a task card needs; list views load only these
+CARD_COLUMNS = (
+    Task.id, Task.title, Task.excerpt, Task.priority, Task.completed, Task.due_date,
+    Task.category_id,
+)
+
 
 def validate_task_data(form_data: dict[str]) -> tuple[bool, list[str] | None]:
     """Validate task form data."""
@@ -44,20 +59,172 @@ def validate_task_data(form_data: dict[str]) -> tuple[bool, list[str] | None]:
     if form_data.get("priority") not in valid_priorities:
         errors.append("Invalid priority level.")
 
+    # Recurrence rule
+    if form_data.get("repeat"):
+        try:
+            Rule(form_data["repeat"], datetime.now())
+        except ValueError as e:
+            errors.append(f"Invalid repeat rule: {e}")
+
     return len(errors) == 0, errors
 
 
+def filter_tasks(query, args: dict[str]):
+    """Apply the dashboard's status, priority and category filters to a query."""
+    status = args.get("status")
+    if status == "pending":
+        query = query.filter(Task.completed.is_(False))
+    elif status == "completed":
+        query = query.filter(Task.completed.is_(True))
+    elif status == "overdue":
+        query = query.filter(Task.is_overdue)
+
+    if args.get("priority") in ["low", "medium", "high"]:
+        query = query.filter(Task.priority == args["priority"])
+
+    # Categories are filtered by id, so the (user_id, category_id) index applies
+    if str(args.get("category", "")).isdigit():
+        query = query.filter(Task.category_id == int(args["category"]))
+
+    return query
+
+
+def filter_occurrences(occurrences: list[Occurrence], args: dict[str]) -> list[Occurrence]:
+    """Apply the dashboard filters to expanded occurrences, which are never completed."""
+    status = args.get("status")
+    if status == "completed":
+        return []
+    if status == "overdue":
+        occurrences = [occurrence for occurrence in occurrences if occurrence.is_overdue]
+
+    if args.get("priority") in ["low", "medium", "high"]:
+        occurrences = [o for o in occurrences if o.priority == args["priority"]]
+
+    if str(args.get("category", "")).isdigit():
+        occurrences = [o for o in occurrences if o.category_id == int(args["category"])]
+
+    return occurrences
+
+
+def occurrence_window() -> tuple[datetime, datetime]:
+    """Days around today whose recurring occurrences the dashboard shows."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return (
+        today - timedelta(days=current_app.config.get("RECURRENCE_LOOKBACK_DAYS", 7)),
+        today + timedelta(days=current_app.config.get("RECURRENCE_WINDOW_DAYS", 14)),
+    )
+
+
+def facet_url(**changes: str | None) -> str:
+    """Dashboard URL with the current filters, some replaced or cleared."""
+    args = {**request.args.to_dict(), **changes}
+    return url_for("tasks.dashboard", **{key: value for key, value in args.items() if value})
+
+
+def task_links() -> dict[str, str]:
+    """URL prefixes for per-task actions, so cards don't call url_for each."""
+    return {
+        name: url_for(endpoint, task_id=0).rsplit("/", 1)[0]
+        for name, endpoint in [
+            ("complete", "tasks.complete_task"),
+            ("edit", "tasks.edit_task"),
+            ("delete", "tasks.delete_task"),
+        ]
+    }
+
+
+def publish_task(event: str, task_id: int) -> None:
+    """Push a committed change to the owner's open dashboards."""
+    if not event_hub.wanted(current_user.id):
+        return
+
+    # The change is already committed; a failed push must not report it as failed
+    try:
+        event_hub.publish(current_user.id, f"task.{event}", task_event_data(event, task_id))
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Could not publish task.%s for task %s", event, task_id)
+
+
+def task_event_data(event: str, task_id: int) -> dict:
+    """Counters and, unless deleted, the re-rendered card for a task event."""
+    stats = get_user_stats(current_user.id)
+    data = {
+        "id": task_id,
+        "stats": {
+            **{key: stats[key] for key in ("total", "pending", "completed", "overdue")},
+            "priority": stats["priority"],
+            "category": {category.id: category.task_count for category in stats["categories"]},
+        },
+    }
+
+    # Deleted tasks only need their id; others carry the re-rendered card
+    task = (
+        db.session.get(Task, task_id, options=[load_only(*CARD_COLUMNS)])
+        if event != "deleted"
+        else None
+    )
+    if task is not None:
+        task_card = get_template_attribute("_macros.html", "task_card")
+        data.update(
+            html=str(task_card(task, task_links())),
+            completed=task.completed,
+            overdue=task.is_overdue,
+            priority=task.priority,
+            category=task.category_id,
+        )
+    return data
+
+
+def buffered(chunks: Iterator[str], size: int) -> Iterator[str]:
+    """Group a template stream's small pieces into chunks of about `size` characters."""
+    pending: list[str] = []
+    length = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(pending)
+            pending, length = [], 0
+    if pending:
+        yield "".join(pending)
+
+
 @tasks.route("/dashboard")
 @login_required
-def dashboard():
-    """Main task dashboard."""
-    # Get all user's tasks
-    user_tasks = (
-        Task.query.filter_by(user_id=current_user.id)
+def dashboard() -> Response:
+    """Main task dashboard, streamed as it renders."""
+    # Rows are fetched from the cursor as the template reaches them
+    query = (
+        filter_tasks(select(Task).where(Task.user_id == current_user.id), request.args)
+        .options(load_only(*CARD_COLUMNS))
         .order_by(Task.created_at.desc())
-        .all()
+        .execution_options(yield_per=200)
+    )
+    user_tasks = db.session.scalars(query)
+    stats = get_user_stats(current_user.id)
+
+    # Recurring tasks are expanded for the visible window only
+    occurrences = filter_occurrences(
+        pending_occurrences(current_user.id, *occurrence_window()), request.args
+    )
+
+    # Pop flashed messages now; the session cookie is sent before the body streams
+    get_flashed_messages(with_categories=True)
+
+    stream = stream_template(
+        "dashboard.html",
+        tasks=user_tasks,
+        occurrences=occurrences,
+        stats=stats,
+        filters=request.args,
+        links=task_links(),
+        facet_url=facet_url,
+    )
+    return Response(
+        buffered(stream, current_app.config.get("STREAM_BUFFER_SIZE", 8192)),
+        mimetype="text/html",
     )
-    return render_template("dashboard.html", tasks=user_tasks)
 
 
 @tasks.route("/create-task", methods=["GET", "POST"])
@@ -72,12 +239,18 @@ def create_task() -> Response:
                 flash(error, "error")
             return redirect(url_for("tasks.create_task"))
 
+        # Repeating tasks only store their rule; occurrences are expanded when viewed
+        if request.form.get("repeat"):
+            return create_recurring_task()
+
         # Create a new task
         new_task = Task(
             title=request.form["title"],
             description=request.form["description"],
             priority=request.form["priority"],
-            category=request.form.get("category", "general"),
+            category_id=category_id_for(
+                current_user.id, request.form.get("category", DEFAULT_CATEGORY)
+            ),
             due_date=(
                 datetime.fromisoformat(request.form["due_date"])
                 if request.form.get("due_date")
@@ -89,26 +262,57 @@ def create_task() -> Response:
         # Commit to database with rollback
         try:
             db.session.add(new_task)
+            record_task_change(current_user.id, None, task_facets(new_task))
             db.session.commit()
+            reminder_scheduler.schedule(new_task.id, new_task.due_date)
+            publish_task("created", new_task.id)
             flash("Task created successfully!", "success")
         except SQLAlchemyError as e:
             db.session.rollback()
             flash(f"Database error: {e}", "error")
 
         return redirect(url_for("tasks.dashboard"))
-    return render_template("create_task.html")
+    return render_template("create_task.html", repeat_choices=REPEAT_CHOICES)
+
+
+def create_recurring_task() -> Response:
+    """Store a recurring task from the validated create form."""
+    if not request.form.get("due_date"):
+        flash("Repeating tasks need a due date for the first occurrence.", "error")
+        return redirect(url_for("tasks.create_task"))
+
+    recurring = RecurringTask(
+        title=request.form["title"],
+        description=request.form["description"],
+        priority=request.form["priority"],
+        category_id=category_id_for(
+            current_user.id, request.form.get("category", DEFAULT_CATEGORY)
+        ),
+        rule=request.form["repeat"].upper(),
+        starts_at=datetime.fromisoformat(request.form["due_date"]),
+        user_id=current_user.id,
+    )
+
+    try:
+        db.session.add(recurring)
+        db.session.commit()
+        flash("Recurring task created!", "success")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        flash(f"Database error: {e}", "error")
+
+    return redirect(url_for("tasks.dashboard"))
+
+
+def owned_task(task_id: int):
+    """Match a task by id only if it belongs to the current user."""
+    return (Task.id == task_id, Task.user_id == current_user.id)
 
 
 @tasks.route("/edit-task/<int:task_id>", methods=["GET", "POST"])
 @login_required
 def edit_task(task_id: int) -> Response:
     """Task editing feature."""
-    # Task query with simple validation
-    task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
-    if not task:
-        flash("Task not found or unauthorized", "error")
-        return redirect(url_for("tasks.dashboard"))
-
     # Editing the tasks
     if request.method == "POST":
         is_valid, errors = validate_task_data(request.form)
@@ -117,20 +321,64 @@ def edit_task(task_id: int) -> Response:
                 flash(error, "error")
             return redirect(url_for("tasks.edit_task", task_id=task_id))
 
-        # Update Task data
-        task.title = request.form["title"]
-        task.description = request.form["description"]
-        task.priority = request.form["priority"]
-        task.category = request.form.get("category", "general")
-        task.due_date = (
+        # Values the form was rendered from; the update only applies if they still hold
+        version = request.form.get("version", type=int)
+        before = [
+            ("priority", request.form.get("original_priority", "")),
+            ("category", request.form.get("original_category", type=int)),
+        ]
+        if version is None or not before[0][1] or before[1][1] is None:
+            # Without them every save would look like a conflicting edit
+            abort(400, "The edit form is missing the task's version fields.")
+        priority = request.form["priority"]
+        due_date = (
             datetime.fromisoformat(request.form["due_date"])
             if request.form.get("due_date")
             else None
         )
 
-        # Commit to database with rollback
+        # Single conditional UPDATE scoped to owner and version
         try:
+            # Keep the current category unless the form names one
+            category_id = before[1][1]
+            if request.form.get("category"):
+                category_id = category_id_for(current_user.id, request.form["category"])
+
+            updated = db.session.execute(
+                update(Task)
+                .where(
+                    *owned_task(task_id),
+                    Task.version == version,
+                    Task.priority == before[0][1],
+                    Task.category_id == before[1][1],
+                )
+                .values(
+                    title=request.form["title"],
+                    description=request.form["description"],
+                    excerpt=make_excerpt(request.form["description"]),
+                    priority=priority,
+                    category_id=category_id,
+                    due_date=due_date,
+                    version=Task.version + 1,
+                )
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            ).first()
+
+            if updated is None:
+                db.session.rollback()
+                if db.session.scalar(select(Task.id).where(*owned_task(task_id))) is None:
+                    flash("Task not found or unauthorized", "error")
+                    return redirect(url_for("tasks.dashboard"))
+                flash("This task was changed elsewhere. Review the latest version and try again.", "error")
+                return redirect(url_for("tasks.edit_task", task_id=task_id))
+
+            record_task_change(
+                current_user.id, before, [("priority", priority), ("category", category_id)]
+            )
             db.session.commit()
+            reminder_scheduler.schedule(task_id, due_date)
+            publish_task("updated", task_id)
             flash("Task updated successfuly!", "success")
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -138,6 +386,12 @@ def edit_task(task_id: int) -> Response:
 
         return redirect(url_for("tasks.dashboard"))
 
+    # Task query with simple validation
+    task = Task.query.options(undefer(Task.description)).filter(*owned_task(task_id)).first()
+    if not task:
+        flash("Task not found or unauthorized", "error")
+        return redirect(url_for("tasks.dashboard"))
+
     return render_template("edit_task.html", task=task)
 
 
@@ -145,21 +399,31 @@ def edit_task(task_id: int) -> Response:
 @login_required
 def complete_task(task_id: int) -> Response:
     """Complete tasks."""
-    # Task query with simple validation
-    task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
-    if not task:
-        flash("Task not found or unauthorized", "error")
-        return redirect(url_for("tasks.dashboard"))
-
-    # Mark complete and commit with rollback
+    # Toggle in one UPDATE; SET expressions read the pre-update row
     try:
-        if task.completed:
-            task.mark_incomplete()
-            flash("Task marked as incomplete.", "info")
-        else:
-            task.mark_complete()
-            flash("Task marked as complete.", "info")
+        task = db.session.execute(
+            update(Task)
+            .where(*owned_task(task_id))
+            .values(
+                completed=~Task.completed,
+                completed_at=case((Task.completed.is_(False), datetime.now()), else_=None),
+                version=Task.version + 1,
+            )
+            .returning(Task.completed, Task.priority, Task.category_id)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        if task is None:
+            db.session.rollback()
+            flash("Task not found or unauthorized", "error")
+            return redirect(url_for("tasks.dashboard"))
+
+        after = task_facets(task)
+        before = [("status", "pending" if task.completed else "completed")] + after[1:]
+        record_task_change(current_user.id, before, after)
         db.session.commit()
+        publish_task("completed", task_id)
+        flash("Task marked as complete." if task.completed else "Task marked as incomplete.", "info")
     except SQLAlchemyError as e:
         db.session.rollback()
         flash(f"Database error: {e}", "error")
@@ -171,17 +435,135 @@ def complete_task(task_id: int) -> Response:
 @login_required
 def delete_task(task_id: int) -> Response:
     """Delete task."""
-    # Task query
-    task = Task.query.filter_by(id=task_id, user_id=current_user.id).first()
-    if not task:
+    # Delete in one statement, returning what the stats need
+    try:
+        task = db.session.execute(
+            delete(Task)
+            .where(*owned_task(task_id))
+            .returning(Task.completed, Task.priority, Task.category_id)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        if task is None:
+            db.session.rollback()
+            flash("Task not found or unauthorized", "error")
+            return redirect(url_for("tasks.dashboard"))
+
+        record_task_change(current_user.id, task_facets(task), None)
+        # Leave a tombstone so syncing clients learn about the delete
+        db.session.add(TaskTombstone(task_id=task_id, user_id=current_user.id))
+        db.session.commit()
+        publish_task("deleted", task_id)
+        flash("Task deleted successfully", "success")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        flash(f"Database error: {e}", "error")
+
+    return redirect(url_for("tasks.dashboard"))
+
+
+def owned_recurrence(recurrence_id: int) -> RecurringTask | None:
+    """Load a recurring task only if it belongs to the current user."""
+    return db.session.scalar(
+        select(RecurringTask).where(
+            RecurringTask.id == recurrence_id, RecurringTask.user_id == current_user.id
+        )
+    )
+
+
+@tasks.route("/complete-occurrence/<int:recurrence_id>/<occurrence>", methods=["GET", "POST"])
+@login_required
+def complete_occurrence(recurrence_id: int, occurrence: str) -> Response:
+    """Complete one occurrence of a recurring task, storing it as a task."""
+    recurring = owned_recurrence(recurrence_id)
+    if recurring is None:
         flash("Task not found or unauthorized", "error")
         return redirect(url_for("tasks.dashboard"))
 
-    # Delete and commit with rollback
     try:
-        db.session.delete(task)
+        when = datetime.fromisoformat(occurrence)
+    except ValueError:
+        when = None
+    if when is None or not Rule(recurring.rule, recurring.starts_at).occurs_at(when):
+        flash("That task doesn't repeat at this time.", "error")
+        return redirect(url_for("tasks.dashboard"))
+
+    try:
+        task = materialize(recurring, when)
         db.session.commit()
-        flash("Task deleted successfully", "success")
+        if task is not None:
+            publish_task("created", task.id)
+        flash("Task marked as complete." if task else "This occurrence is already stored.", "info")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        flash(f"Database error: {e}", "error")
+
+    return redirect(url_for("tasks.dashboard"))
+
+
+@tasks.route("/edit-recurrence/<int:recurrence_id>", methods=["GET", "POST"])
+@login_required
+def edit_recurrence(recurrence_id: int) -> Response:
+    """Edit a recurring task; stored occurrences keep their values."""
+    recurring = owned_recurrence(recurrence_id)
+    if recurring is None:
+        flash("Task not found or unauthorized", "error")
+        return redirect(url_for("tasks.dashboard"))
+
+    if request.method == "POST":
+        is_valid, errors = validate_task_data(request.form)
+        if not request.form.get("repeat"):
+            is_valid = False
+            errors.append("Choose how often the task repeats.")
+        if not is_valid:
+            for error in errors:
+                flash(error, "error")
+            return redirect(url_for("tasks.edit_recurrence", recurrence_id=recurrence_id))
+
+        # Flushing the change invalidates the owner's cached expansion
+        recurring.title = request.form["title"]
+        recurring.description = request.form["description"]
+        recurring.priority = request.form["priority"]
+        recurring.rule = request.form["repeat"].upper()
+        try:
+            db.session.commit()
+            flash("Recurring task updated!", "success")
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            flash(f"Database error: {e}", "error")
+
+        return redirect(url_for("tasks.dashboard"))
+
+    return render_template(
+        "edit_recurrence.html", recurring=recurring, repeat_choices=REPEAT_CHOICES
+    )
+
+
+@tasks.route("/delete-recurrence/<int:recurrence_id>")
+@login_required
+def delete_recurrence(recurrence_id: int) -> Response:
+    """Stop a recurring task; completed occurrences stay as ordinary tasks."""
+    recurring = owned_recurrence(recurrence_id)
+    if recurring is None:
+        flash("Task not found or unauthorized", "error")
+        return redirect(url_for("tasks.dashboard"))
+
+    try:
+        db.session.execute(
+            update(Task)
+            .where(Task.recurrence_id == recurring.id, Task.user_id == current_user.id)
+            .values(recurrence_id=None, version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(ArchivedTask)
+            .where(ArchivedTask.recurrence_id == recurring.id, ArchivedTask.user_id == current_user.id)
+            .values(recurrence_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.delete(recurring)
+        db.session.commit()
+        flash("Recurring task stopped.", "success")
     except SQLAlchemyError as e:
         db.session.rollback()
         flash(f"Database error: {e}", "error")
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from archive import archive_completed
+from conftest import create_task
+from models import db, ArchivedTask, Task
+
+
+def archive_now(app, *task_ids):
+    """Backdate the tasks' completion and run the archival job."""
+    with app.app_context():
+        db.session.execute(
+            update(Task).where(Task.id.in_(task_ids)).values(completed_at=datetime.now() - timedelta(days=60))
+        )
+        db.session.commit()
+        assert archive_completed(30, 100) == len(task_ids)
+
+
+def test_restore_keeps_id_after_newer_tasks(client, app):
+    """Archiving the newest task doesn't free its id for the next one."""
+    create_task(client, "A")
+    b = create_task(client, "B")
+    client.get(f"/complete-task/{b}")
+    archive_now(app, b)
+
+    c = create_task(client, "C")
+    assert c > b
+
+    response = client.get(f"/archive/{b}/restore")
+    assert response.status_code == 302
+    with app.app_context():
+        restored = db.session.get(Task, b)
+        assert (restored.title, restored.completed) == ("B", False)
+        assert db.session.get(Task, c).title == "C"
+        assert db.session.scalar(db.select(db.func.count(ArchivedTask.id))) == 0
+
+
+def test_complete_task_ignores_archive(client, app):
+    """Toggling an archived id does nothing; only the restore endpoint reopens it."""
+    task_id = create_task(client, "Old")
+    client.get(f"/complete-task/{task_id}")
+    archive_now(app, task_id)
+
+    page = client.get(f"/complete-task/{task_id}", follow_redirects=True).get_data(as_text=True)
+    assert "Task not found or unauthorized" in page
+    with app.app_context():
+        assert db.session.get(ArchivedTask, task_id) is not None
+
+    assert "Task not found" in client.get("/archive/999/restore", follow_redirects=True).get_data(as_text=True)
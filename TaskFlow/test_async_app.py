@@ -0,0 +1,52 @@
+import asyncio
+from async_app import AsyncApp
+from conftest import create_task
+from metrics import metrics
+from test_archive import archive_now
+
+
+def call(asgi: AsyncApp, path: str, cookie: str = "") -> list[dict]:
+    """Run one GET through the ASGI app and return the messages it sent."""
+    scope = {
+        "type": "http", "method": "GET", "path": path, "query_string": b"", "scheme": "http",
+        "headers": [(b"cookie", cookie.encode())] if cookie else [],
+    }
+    messages = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    asyncio.run(asgi(scope, receive, send))
+    return messages
+
+
+def test_async_export_matches_flask_export(client, app):
+    """The native export sends the same filename and rows, archived ones included, as the Flask route."""
+    create_task(client, "Exported")
+    archived = create_task(client, "Archived")
+    client.get(f"/complete-task/{archived}")
+    archive_now(app, archived)
+    flask_response = client.get("/export/tasks.csv")
+    cookie = f"session={client.get_cookie('session').value}"
+
+    messages = call(AsyncApp(app), "/export/tasks.csv", cookie)
+    headers = dict(messages[0]["headers"])
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    assert messages[0]["status"] == 200
+    assert headers[b"content-disposition"].decode() == flask_response.headers["Content-Disposition"]
+    assert body.decode() == flask_response.get_data(as_text=True)
+
+
+def test_async_routes_record_metrics(app):
+    """Native routes count their responses like Flask requests."""
+    messages = call(AsyncApp(app), "/export/tasks.ndjson")
+    assert messages[0]["status"] == 302
+    with app.app_context():
+        lines = metrics.render().splitlines()
+    assert any(
+        line.startswith('taskflow_responses_total{route="export.export_ndjson",method="GET",status="302"}')
+        for line in lines
+    )
@@ -0,0 +1,65 @@
+from cache import UserCache, user_cache
+from conftest import create_task
+from models import db, User
+
+
+def test_cache_hits_after_first_load(app):
+    """A cached user is served without another lookup until it expires."""
+    with app.app_context():
+        user = User(username="bob", email="bob@example.com", first_name="Bob", last_name="B")
+        user.set_password("abc123")
+        db.session.add(user)
+        db.session.commit()
+
+        cache = UserCache(ttl=60)
+        assert cache.get(user.id).username == "bob"
+        assert cache.get(user.id).username == "bob"
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+        assert cache.get(user.id + 1) is None
+
+
+def test_cache_evicts_least_recently_used():
+    """The oldest entry is dropped once the cache is full."""
+    cache = UserCache(max_size=2)
+
+    class Record:
+        def __init__(self, id):
+            self.id = id
+
+    for user_id in (1, 2, 3):
+        cache.put(Record(user_id))
+    assert cache.stats()["size"] == 2
+    assert 1 not in cache._entries
+
+
+def test_update_invalidates_only_after_commit(app):
+    """A flushed but uncommitted change leaves the cached record alone."""
+    with app.app_context():
+        user = User(username="carol", email="carol@example.com", first_name="Carol", last_name="C")
+        user.set_password("abc123")
+        db.session.add(user)
+        db.session.commit()
+        user_cache.get(user.id)
+
+        user.first_name = "Caroline"
+        db.session.flush()
+        assert user.id in user_cache._entries
+
+        db.session.commit()
+        assert user.id not in user_cache._entries
+        assert user_cache.get(user.id).first_name == "Caroline"
+
+
+def test_index_counts_use_stats(client):
+    """The home page counts come from the counters, not a relationship."""
+    create_task(client, "First")
+    second = create_task(client, "Second")
+    client.get(f"/complete-task/{second}")
+
+    page = client.get("/").get_data(as_text=True)
+    counts = [line.strip() for line in page.splitlines() if line.strip().startswith("<h3")]
+    assert counts == [
+        '<h3 class="text-primary">1</h3>',
+        '<h3 class="text-success">1</h3>',
+        '<h3 class="text-info">2</h3>',
+    ]
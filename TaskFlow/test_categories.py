@@ -0,0 +1,36 @@
+from categories import category_id_for, normalize_name, user_categories
+from conftest import create_task, make_app
+from migrations import upgrade
+from models import db, Category, Task
+from test_migrations import seed_version_1
+
+
+def test_normalize_name():
+    assert normalize_name("  Work ") == "work"
+    assert normalize_name("") == "general"
+    assert normalize_name(None) == "general"
+    assert normalize_name("x" * 60) == "x" * 50
+
+
+def test_names_share_one_category(client, app):
+    """Differently written names resolve to one category with a shared count."""
+    create_task(client, "One", category="Work")
+    create_task(client, "Two", category=" work")
+    with app.app_context():
+        assert [(name, count) for _, name, count in user_categories(1)] == [("work", 2)]
+
+
+def test_migrated_categories_are_normalized(tmp_path):
+    """Migration 5 merges names that only differ in case and spacing."""
+    app = make_app(tmp_path, version=1)
+    seed_version_1(app)
+    with app.app_context():
+        upgrade()
+        names = dict(db.session.execute(db.select(Category.name, Category.task_count)).all())
+        assert names == {"work": 2, "shopping": 1}
+
+        # A category typed after the upgrade finds the migrated row
+        work = db.session.scalar(db.select(Category.id).where(Category.name == "work"))
+        assert category_id_for(1, "Work") == work
+        titles = db.session.scalars(db.select(Task.title).where(Task.category_id == work)).all()
+        assert sorted(titles) == ["Plan trip", "Write report"]
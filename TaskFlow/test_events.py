@@ -0,0 +1,84 @@
+import runpy
+from pathlib import Path
+import tasks
+from conftest import create_task, make_app, register
+from events import event_hub
+
+
+CONF = Path(__file__).with_name("gunicorn.conf.py")
+
+
+def test_streams_are_capped_per_process(tmp_path):
+    """Past EVENT_MAX_STREAMS a stream ends at once with a retry hint, and closing one frees its slot."""
+    app = make_app(tmp_path, EVENT_MAX_STREAMS=1)
+    client = app.test_client()
+    register(client, "alice")
+
+    first = client.get("/events", buffered=False)
+    assert first.status_code == 200
+    # EventSource only reconnects after a 200, so the refusal is an empty stream
+    refused = client.get("/events")
+    assert refused.status_code == 200
+    assert refused.mimetype == "text/event-stream"
+    retry = refused.get_data(as_text=True)
+    assert retry.startswith("retry: ") and retry.endswith("\n\n")
+    assert 15_000 <= int(retry[7:-2]) <= 300_000
+    assert event_hub.streams == 1
+
+    first.close()
+    assert event_hub.streams == 0
+    again = client.get("/events", buffered=False)
+    assert again.status_code == 200
+    again.close()
+
+
+def test_stream_ends_after_time_limit(tmp_path):
+    """A stream closes itself after EVENT_STREAM_SECONDS so browsers reconnect."""
+    app = make_app(tmp_path, EVENT_STREAM_SECONDS=0)
+    client = app.test_client()
+    register(client, "alice")
+
+    response = client.get("/events")
+    assert response.get_data(as_text=True) == "retry: 5000\n\n"
+    assert event_hub.streams == 0
+
+
+def test_disabled_backend_answers_no_content(tmp_path):
+    """EVENT_BACKEND = "none" tells browsers to stop reconnecting."""
+    app = make_app(tmp_path, EVENT_BACKEND="none")
+    client = app.test_client()
+    register(client, "alice")
+
+    assert client.get("/events").status_code == 204
+    assert not event_hub.wanted(1)
+
+
+def test_publish_failure_keeps_committed_write(client, monkeypatch):
+    """A task saved before publishing fails is reported as saved."""
+    def fail(event, task_id):
+        raise RuntimeError("broker down")
+
+    monkeypatch.setattr(event_hub, "wanted", lambda user_id: True)
+    monkeypatch.setattr(tasks, "task_event_data", fail)
+    assert create_task(client, "Saved") is not None
+
+    page = client.get("/dashboard").get_data(as_text=True)
+    assert "Task created successfully!" in page
+    assert "Database error" not in page
+
+
+def test_gunicorn_turns_off_memory_backend_for_several_workers(monkeypatch):
+    """Several workers can't share the memory backend, so live updates go off instead of failing."""
+    monkeypatch.delenv("EVENT_BACKEND", raising=False)
+    monkeypatch.delenv("TASKFLOW_THREADS", raising=False)
+    monkeypatch.delenv("EVENT_MAX_STREAMS", raising=False)
+
+    monkeypatch.setenv("TASKFLOW_WORKERS", "3")
+    settings = runpy.run_path(CONF)
+    assert settings["raw_env"] == ["EVENT_BACKEND=none"]
+    assert settings["threads"] == 4
+
+    monkeypatch.setenv("TASKFLOW_WORKERS", "1")
+    settings = runpy.run_path(CONF)
+    assert settings["raw_env"] == []
+    assert settings["threads"] == 4 + 16
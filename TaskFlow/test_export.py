@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from datetime import datetime
+import export
+from conftest import create_task
+from models import db, Category
+from test_archive import archive_now
+
+
+def test_export_includes_archived_tasks(client, app):
+    """Exports are a full history: archived tasks come along, in id order."""
+    old = create_task(client, "Old", priority="high")
+    create_task(client, "Current", priority="low")
+    client.get(f"/complete-task/{old}")
+    archive_now(app, old)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/export/tasks.csv").get_data(as_text=True))))
+    assert [(row["title"], row["completed"]) for row in rows] == [("Old", "True"), ("Current", "False")]
+    assert rows[0]["completed_at"]
+
+    records = [json.loads(line) for line in client.get("/export/tasks.ndjson").get_data(as_text=True).splitlines()]
+    assert [(record["title"], record["completed"]) for record in records] == [("Old", True), ("Current", False)]
+
+    # Filters apply to archived tasks too
+    pending = client.get("/export/tasks.ndjson?status=pending").get_data(as_text=True)
+    assert [json.loads(line)["title"] for line in pending.splitlines()] == ["Current"]
+    high = client.get("/export/tasks.ndjson?priority=high").get_data(as_text=True)
+    assert [json.loads(line)["title"] for line in high.splitlines()] == ["Old"]
+
+
+def test_csv_export_is_streamed_in_chunks(client, app, monkeypatch):
+    """Rows are read in batches and the CSV comes out in several chunks with a fixed header."""
+    monkeypatch.setattr(export, "CHUNK_SIZE", 200)
+    app.config["EXPORT_BATCH_SIZE"] = 2
+    for number in range(5):
+        create_task(client, f"Task {number}", description="x" * 100)
+
+    response = client.get("/export/tasks.csv")
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == f"attachment; filename={export.export_filename('csv')}"
+
+    chunks = [chunk.decode() for chunk in response.response]
+    assert len(chunks) > 2
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == export.FIELDNAMES
+    assert [row[1] for row in rows[1:]] == [f"Task {number}" for number in range(5)]
+
+
+def test_ndjson_export_shape_and_filters(client, app):
+    """One JSON object per task with ISO dates; dashboard filters narrow the rows."""
+    first = create_task(client, "First", priority="high", category="work")
+    create_task(client, "Second", priority="low")
+    client.get(f"/complete-task/{first}")
+
+    response = client.get("/export/tasks.ndjson")
+    assert response.mimetype == "application/x-ndjson"
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert list(records[0]) == export.FIELDNAMES
+    assert records[0]["category"] == "work"
+    assert records[0]["due_date"] == "2099-01-01T10:00:00"
+    assert datetime.fromisoformat(records[0]["completed_at"])
+
+    def titles(query: str) -> list[str]:
+        body = client.get(f"/export/tasks.ndjson?{query}").get_data(as_text=True)
+        return [json.loads(line)["title"] for line in body.splitlines()]
+
+    with app.app_context():
+        work = db.session.scalar(db.select(Category.id).where(Category.name == "work"))
+    assert titles("status=completed") == ["First"]
+    assert titles("priority=low") == ["Second"]
+    assert titles(f"category={work}") == ["First"]
@@ -0,0 +1,74 @@
+import io
+from datetime import datetime
+from sqlalchemy import func, select
+from conftest import register
+from importer import import_todo_csv
+from models import db, Task, User
+from stats import get_user_stats
+
+
+TODO_CSV = """description,priority,created,completed
+Write report,High,2025-03-01,False
+Buy milk,Medium,2025-03-02,True
+,Low,2025-03-03,False
+Call mom,Urgent,2025-03-04,False
+Water plants,Low,yesterday,False
+Book flights,Low,2025-03-05,false
+"""
+
+
+def test_import_maps_rows_and_commits_each_batch(client, app):
+    """Valid rows are mapped onto TaskFlow's fields, bad ones skipped, and every batch committed."""
+    committed = []
+
+    def progress(result):
+        # Counted on a separate connection, so only committed rows show up
+        with db.engine.connect() as conn:
+            committed.append((result.imported, conn.scalar(select(func.count()).select_from(Task))))
+
+    with app.app_context():
+        user_id = db.session.scalar(select(User.id))
+        result = import_todo_csv(io.StringIO(TODO_CSV), user_id, batch_size=2, progress=progress)
+
+        assert (result.imported, result.skipped) == (3, 3)
+        assert result.errors == [
+            "Line 4: Missing description.",
+            "Line 5: Invalid priority 'Urgent'.",
+            "Line 6: Invalid created date 'yesterday'.",
+        ]
+        assert committed == [(2, 2), (3, 3)]
+
+        tasks = {
+            task.title: (task.priority, task.completed, task.completed_at)
+            for task in db.session.scalars(select(Task))
+        }
+        assert tasks == {
+            "Write report": ("high", False, None),
+            "Buy milk": ("medium", True, datetime(2025, 3, 2)),
+            "Book flights": ("low", False, None),
+        }
+
+        stats = get_user_stats(user_id)
+        assert (stats["total"], stats["pending"], stats["completed"]) == (3, 2, 1)
+        assert stats["priority"] == {"high": 1, "medium": 1, "low": 1}
+
+
+def test_import_rejects_files_without_todo_columns(app):
+    """A file missing the ToDo columns imports nothing."""
+    with app.app_context():
+        result = import_todo_csv(io.StringIO("title,due\nA,2025-01-01\n"), 1)
+    assert (result.imported, result.skipped) == (0, 1)
+    assert result.errors == ["Line 1: Missing columns: completed, created, description, priority."]
+
+
+def test_import_upload(app):
+    """The import page takes a file upload and reports the totals."""
+    client = app.test_client()
+    register(client, "alice")
+    response = client.post(
+        "/import-tasks",
+        data={"file": (io.BytesIO(TODO_CSV.encode("utf-8-sig")), "tasks.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert "Imported 3 tasks, skipped 3." in response.get_data(as_text=True)
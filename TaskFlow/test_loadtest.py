@@ -0,0 +1,43 @@
+from conftest import make_app, register
+from loadtest import run_load
+from models import db, Task, User
+from synthetic import generate_population
+
+
+def task_rows(app) -> list[tuple]:
+    with app.app_context():
+        return db.session.execute(
+            db.select(Task.title, Task.priority, Task.created_at, Task.due_date, Task.completed_at)
+            .order_by(Task.id)
+        ).all()
+
+
+def test_same_seed_gives_same_data(tmp_path):
+    """Two runs with one seed produce identical tasks, timestamps included."""
+    apps = [make_app(tmp_path / name) for name in ("one", "two")]
+    for app in apps:
+        with app.app_context():
+            generate_population(5, 200, seed=7, batch_size=50)
+    assert task_rows(apps[0]) == task_rows(apps[1])
+
+
+def test_seeding_leaves_existing_users_alone(app):
+    """Users whose names share the prefix don't receive synthetic tasks."""
+    register(app.test_client(), "loader")
+    with app.app_context():
+        assert generate_population(3, 50, prefix="load") == (3, 50)
+        owner = db.session.scalar(db.select(User.id).where(User.username == "loader"))
+        assert db.session.scalar(db.select(db.func.count()).where(Task.user_id == owner)) == 0
+
+
+def test_edits_are_saved_not_conflicts(app):
+    """Load-test edits send the form's version, so they save instead of conflicting."""
+    with app.app_context():
+        generate_population(2, 40, seed=3, batch_size=20)
+        versions = db.session.scalar(db.select(db.func.sum(Task.version)))
+
+    run, _ = run_load(app, 20, 2, ["load0", "load1"], mix={"edit": 1})
+    assert len(run.latencies["edit"]) == 20
+    assert run.errors.get("edit", 0) == 0
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.sum(Task.version))) == versions + 20
@@ -0,0 +1,57 @@
+import pytest
+from time import sleep
+from flask import Response
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from conftest import make_app
+from metrics import metrics
+from models import db
+
+
+def test_counters_keep_full_precision(app):
+    """Counters past a million are printed exactly, not as 1e+06."""
+    metrics.increment("taskflow_test_total", value=1_234_567)
+    with app.app_context():
+        assert "taskflow_test_total 1234567.0" in metrics.render().splitlines()
+
+
+def test_metrics_token_required_when_configured(tmp_path):
+    """An app that requires a metrics token won't start without one."""
+    with pytest.raises(RuntimeError, match="METRICS_TOKEN"):
+        make_app(tmp_path, METRICS_REQUIRE_TOKEN=True, METRICS_TOKEN=None)
+
+
+def test_metrics_endpoint_checks_bearer_token(tmp_path):
+    """With a token set, /metrics needs it as a bearer token."""
+    client = make_app(tmp_path, METRICS_REQUIRE_TOKEN=True, METRICS_TOKEN="s3cret").test_client()
+    # Buffered, so the test client closes the response like a server does
+    assert client.get("/metrics", buffered=True).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "taskflow_request_duration_seconds" in response.get_data(as_text=True)
+
+
+def test_streamed_response_timed_until_closed(app):
+    """A streamed body counts towards the request duration, not just time to first byte."""
+    def slow_stream():
+        def generate():
+            yield "first"
+            sleep(0.05)
+            yield "last"
+        return Response(generate())
+
+    app.add_url_rule("/slow-stream", "slow_stream", slow_stream)
+    response = app.test_client().get("/slow-stream", buffered=True)
+    assert response.get_data(as_text=True) == "firstlast"
+
+    histogram = metrics._histograms["taskflow_request_duration_seconds"]['route="slow_stream",method="GET"']
+    assert histogram.count == 1
+    assert histogram.sum >= 0.05
+
+
+def test_failed_statement_drops_its_start_time(app):
+    """A statement that raises doesn't leave its start time on the connection."""
+    with app.app_context(), db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["query_start"] == []
@@ -0,0 +1,123 @@
+from datetime import datetime
+from sqlalchemy import create_engine, inspect, text
+from conftest import make_app
+from migrations import current_version, latest_version, upgrade
+from models import db, Task
+from stats import rebuild_stats
+from test_stats import counters
+
+
+def schema(engine) -> dict:
+    """Tables with their columns, indexes, unique constraints and foreign keys."""
+    inspector = inspect(engine)
+    return {
+        table: (
+            sorted((col["name"], str(col["type"]), col["nullable"]) for col in inspector.get_columns(table)),
+            sorted((index["name"], tuple(index["column_names"]), bool(index["unique"]))
+                   for index in inspector.get_indexes(table)),
+            sorted(tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table)),
+            sorted((tuple(fk["constrained_columns"]), fk["referred_table"])
+                   for fk in inspector.get_foreign_keys(table)),
+        )
+        for table in inspector.get_table_names()
+        if table != "schema_version"
+    }
+
+
+def test_upgrade_matches_models(app, tmp_path):
+    """Migrating an empty database gives the same schema as the models."""
+    reference = create_engine(f"sqlite:///{tmp_path / 'reference.db'}")
+    db.metadata.create_all(reference)
+    with app.app_context():
+        assert schema(db.engine) == schema(reference)
+        with db.engine.connect() as conn:
+            assert current_version(conn) == latest_version()
+
+
+def test_upgrade_is_idempotent(app):
+    """Running the upgrade again applies nothing."""
+    with app.app_context():
+        assert upgrade() == latest_version()
+
+
+def seed_version_1(app) -> None:
+    """Users and tasks as the first schema stored them, category names included."""
+    now = datetime(2025, 3, 1)
+    with app.app_context(), db.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, password_hash, first_name, last_name, created_at, updated_at) "
+            "VALUES (1, 'old', 'old@example.com', 'x', 'Old', 'User', :now, :now)"
+        ), {"now": now})
+        tasks = [
+            ("Write report", "x" * 150, 1, "high", "Work"),
+            ("Plan trip", "Short", 0, "low", " work "),
+            ("Buy milk", "Milk", 0, "low", "shopping"),
+        ]
+        for title, description, completed, priority, category in tasks:
+            conn.execute(text(
+                "INSERT INTO tasks (title, description, completed, priority, category, created_at, updated_at, user_id) "
+                "VALUES (:title, :description, :completed, :priority, :category, :now, :now, 1)"
+            ), {"title": title, "description": description, "completed": completed,
+                "priority": priority, "category": category, "now": now})
+
+
+def test_upgrade_keeps_existing_data(tmp_path):
+    """Tasks from the first schema come through with counters and excerpts filled in."""
+    app = make_app(tmp_path, version=1)
+    seed_version_1(app)
+    with app.app_context():
+        upgrade()
+        migrated = counters(1)
+        assert migrated == {
+            ("status", "completed"): 1, ("status", "pending"): 2,
+            ("priority", "high"): 1, ("priority", "low"): 2,
+        }
+        rebuild_stats(1)
+        db.session.commit()
+        assert counters(1) == migrated
+
+        excerpts = dict(db.session.execute(db.select(Task.title, Task.excerpt)).all())
+        assert excerpts["Write report"] == "x" * 100 + "..."
+        assert excerpts["Plan trip"] == "Short"
+
+
+def test_stats_backfilled_at_version_2(tmp_path):
+    """Migration 2 counts the tasks that existed before the counters did."""
+    app = make_app(tmp_path, version=1)
+    seed_version_1(app)
+    with app.app_context():
+        upgrade(2)
+        with db.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT dimension, value, count FROM user_task_stats WHERE user_id = 1"
+            )).all()
+    assert sorted(rows) == [
+        ("category", " work ", 1), ("category", "Work", 1), ("category", "shopping", 1),
+        ("priority", "high", 1), ("priority", "low", 2),
+        ("status", "completed", 1), ("status", "pending", 2),
+    ]
+
+
+def test_task_ids_start_past_archived_and_deleted(tmp_path):
+    """Migration 11 keeps the tasks and starts new ids after every id used so far."""
+    app = make_app(tmp_path, version=1)
+    seed_version_1(app)
+    with app.app_context():
+        upgrade(10)
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO archived_tasks (id, title, description, priority, category_id, created_at, "
+                "updated_at, completed_at, archived_at, user_id) "
+                "SELECT 7, 'Old', 'Old', 'low', MIN(id), :now, :now, :now, :now, 1 FROM categories"
+            ), {"now": datetime(2025, 3, 1)})
+            conn.execute(text(
+                "INSERT INTO task_tombstones (task_id, user_id, deleted_at) VALUES (9, 1, :now)"
+            ), {"now": datetime(2025, 3, 1)})
+
+        upgrade()
+        with db.engine.connect() as conn:
+            assert "AUTOINCREMENT" in conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'tasks'")
+            ).scalar()
+            assert conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'")).scalar() == 9
+        assert db.session.scalar(db.select(db.func.count(Task.id))) == 3
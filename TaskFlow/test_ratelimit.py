@@ -0,0 +1,39 @@
+from conftest import make_app, register
+from ratelimit import MemoryStore
+
+
+def test_bucket_refills_over_time():
+    """An empty bucket reports the wait until its next token."""
+    store = MemoryStore()
+    assert store.take("key", 2, 0.5, now=0) == 0
+    assert store.take("key", 2, 0.5, now=0) == 0
+    assert store.take("key", 2, 0.5, now=0) == 2.0
+    assert store.take("key", 2, 0.5, now=2) == 0
+
+
+def test_login_is_throttled_per_account(tmp_path):
+    """Past the account limit a login gets 429 with Retry-After, before the password check."""
+    app = make_app(tmp_path, RATELIMIT_ENABLED=True, RATELIMIT_LOGIN_ACCOUNT=(2, 300))
+    client = app.test_client()
+    register(client, "alice")
+    client.get("/logout")
+
+    login = {"username_or_email": "alice", "password": "wrong1"}
+    assert client.post("/login", data=login).status_code == 200
+    assert client.post("/login", data=login).status_code == 200
+    response = client.post("/login", data={**login, "password": "abc123"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_username_and_email_share_account_budget(tmp_path):
+    """Logging in by username or by email draws on the same account bucket."""
+    app = make_app(tmp_path, RATELIMIT_ENABLED=True, RATELIMIT_LOGIN_ACCOUNT=(2, 300))
+    client = app.test_client()
+    register(client, "alice")
+    client.get("/logout")
+
+    assert client.post("/login", data={"username_or_email": "alice", "password": "wrong1"}).status_code == 200
+    assert client.post("/login", data={"username_or_email": "Alice@Example.com", "password": "wrong1"}).status_code == 200
+    response = client.post("/login", data={"username_or_email": "alice@example.com", "password": "abc123"})
+    assert response.status_code == 429
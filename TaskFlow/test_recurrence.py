@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import create_task
+from models import db, RecurringTask, Task
+from recurrence import Rule, recurrence_cache
+
+
+def test_weekday_rule():
+    """BYDAY expands to the listed weekdays, starting at the first occurrence."""
+    start = datetime(2025, 1, 1, 9)  # a Wednesday
+    rule = Rule("FREQ=WEEKLY;BYDAY=MO,WE,FR", start)
+    days = [when.day for when in rule.between(start, datetime(2025, 1, 11))]
+    assert days == [1, 3, 6, 8, 10]
+
+
+def test_rule_jumps_to_distant_windows():
+    """Expanding a window far from the start matches a walk from the start."""
+    start = datetime(2020, 1, 31, 8)
+    rule = Rule("FREQ=MONTHLY;INTERVAL=1", start)
+    window = list(rule.between(datetime(2024, 2, 1), datetime(2024, 4, 1)))
+    assert window == [datetime(2024, 2, 29, 8), datetime(2024, 3, 31, 8)]
+    assert rule.occurs_at(datetime(2024, 2, 29, 8))
+    assert not rule.occurs_at(datetime(2024, 2, 28, 8))
+
+
+def test_count_and_until_end_the_rule():
+    start = datetime(2025, 1, 1)
+    assert len(list(Rule("FREQ=DAILY;COUNT=3", start).between(start, datetime(2026, 1, 1)))) == 3
+    until = list(Rule("FREQ=DAILY;UNTIL=20250105", start).between(start, datetime(2026, 1, 1)))
+    assert until[-1] == datetime(2025, 1, 5)
+
+
+@pytest.mark.parametrize("text", ["FREQ=HOURLY", "FREQ=DAILY;BYDAY=MO", "FREQ=DAILY;INTERVAL=0", "FREQ"])
+def test_invalid_rules(text):
+    with pytest.raises(ValueError):
+        Rule(text, datetime(2025, 1, 1))
+
+
+def test_occurrence_is_stored_once_completed(client, app):
+    """Repeating tasks only store a rule; completing an occurrence stores it as a task."""
+    tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    create_task(client, "Standup", repeat="FREQ=DAILY", due_date=tomorrow.strftime("%Y-%m-%dT%H:%M"))
+    with app.app_context():
+        recurrence_id = db.session.scalar(db.select(RecurringTask.id))
+        assert db.session.scalar(db.select(db.func.count()).select_from(Task)) == 0
+
+    assert client.get("/dashboard").get_data(as_text=True).count("Standup") >= 2
+
+    url = f"/complete-occurrence/{recurrence_id}/{tomorrow.isoformat()}"
+    client.get(url)
+    assert b"already stored" in client.get(url, follow_redirects=True).data
+    with app.app_context():
+        task = db.session.scalar(db.select(Task))
+        assert (task.occurrence, task.completed) == (tomorrow, True)
+
+    # Times the rule doesn't produce are refused
+    response = client.get(f"/complete-occurrence/{recurrence_id}/{(tomorrow + timedelta(hours=1)).isoformat()}",
+                          follow_redirects=True)
+    assert b"doesn&#39;t repeat" in response.data or b"doesn't repeat" in response.data
+
+
+def test_rule_change_invalidates_only_after_commit(client, app):
+    """A flushed but uncommitted rule change leaves the cached expansion alone."""
+    tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    create_task(client, "Standup", repeat="FREQ=DAILY", due_date=tomorrow.strftime("%Y-%m-%dT%H:%M"))
+    start, end = tomorrow, tomorrow + timedelta(days=7)
+    with app.app_context():
+        recurring = db.session.scalar(db.select(RecurringTask))
+        assert len(recurrence_cache.get(recurring.user_id, start, end)) == 7
+
+        recurring.rule = "FREQ=WEEKLY"
+        db.session.flush()
+        assert recurring.user_id in recurrence_cache._entries
+
+        db.session.commit()
+        assert recurring.user_id not in recurrence_cache._entries
+        assert len(recurrence_cache.get(recurring.user_id, start, end)) == 1
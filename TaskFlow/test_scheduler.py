@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from conftest import create_task
+from models import db, Task, TaskReminder
+from scheduler import ReminderScheduler, record_reminders
+
+
+def set_due(app, **due_dates: datetime) -> dict[str, int]:
+    """Move tasks (by title) to the given deadlines; returns their ids."""
+    with app.app_context():
+        ids = dict(db.session.execute(db.select(Task.title, Task.id)).all())
+        for title, due_date in due_dates.items():
+            db.session.execute(update(Task).where(Task.id == ids[title]).values(due_date=due_date))
+        db.session.commit()
+    return ids
+
+
+def test_record_reminders_window_and_idempotence(client, app):
+    """Only pending deadlines inside (since, until] are recorded, and only once."""
+    now = datetime.now().replace(microsecond=0)
+    for title in ("Early", "Inside", "Edge", "Done"):
+        create_task(client, title)
+    ids = set_due(
+        app,
+        Early=now - timedelta(hours=3),
+        Inside=now - timedelta(hours=1),
+        Edge=now - timedelta(minutes=30),
+        Done=now - timedelta(hours=1),
+    )
+    client.get(f"/complete-task/{ids['Done']}")
+
+    since, until = now - timedelta(hours=2), now - timedelta(minutes=30)
+    with app.app_context():
+        assert record_reminders(since, until) == 2
+        db.session.commit()
+        # A second scheduler sweeping the same window adds nothing
+        assert record_reminders(since, until) == 0
+        db.session.commit()
+        recorded = db.session.scalars(db.select(TaskReminder.task_id).order_by(TaskReminder.task_id))
+        assert list(recorded) == [ids["Inside"], ids["Edge"]]
+
+
+def test_tick_records_and_loads_heap(client, app):
+    """A tick records crossed deadlines and loads the ones inside the horizon."""
+    now = datetime.now().replace(microsecond=0)
+    for title in ("Missed", "Soon", "Later", "Far"):
+        create_task(client, title)
+    ids = set_due(
+        app,
+        Missed=now - timedelta(minutes=10),
+        Soon=now + timedelta(hours=1),
+        Later=now + timedelta(hours=2),
+        Far=now + timedelta(hours=48),
+    )
+
+    scheduler = ReminderScheduler()
+    scheduler._last_checked = now - timedelta(hours=1)
+    with app.app_context():
+        scheduler._tick(now)
+        assert db.session.scalars(db.select(TaskReminder.task_id)).all() == [ids["Missed"]]
+
+    assert sorted(scheduler._heap) == [
+        (now + timedelta(hours=1), ids["Soon"]), (now + timedelta(hours=2), ids["Later"]),
+    ]
+    assert scheduler._loaded_until == now + scheduler.horizon
+    assert scheduler._last_checked == now
+    # It sleeps until the earliest deadline, or max_sleep if that comes first
+    assert scheduler._seconds_until_next(now) == 300
+    scheduler.max_sleep = 7200
+    assert scheduler._seconds_until_next(now) == 3600
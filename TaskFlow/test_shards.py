@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from archive import archive_completed
+from conftest import register
+from models import db, ArchivedTask, Task, TaskReminder, User
+from shards import locate, move_user, using_shard
+
+
+def add_task(client, title: str, **fields) -> None:
+    """Create a task through the form; conftest.create_task only reads the main database."""
+    client.post("/create-task", data={
+        "title": title, "description": title, "priority": "medium",
+        "category": "general", "due_date": "2099-01-01T10:00", **fields,
+    })
+
+
+def titles(user_id: int) -> dict[str, int]:
+    """A user's tasks on the routed shard as {title: id}."""
+    return dict(db.session.execute(select(Task.title, Task.id).where(Task.user_id == user_id)).all())
+
+
+def test_move_remaps_ids_and_keeps_archive_apart(sharded_app):
+    """A moved user's rows get fresh ids on the new shard, archived ones included."""
+    alice, bob = sharded_app.test_client(), sharded_app.test_client()
+    register(alice, "alice")
+    register(bob, "bob")
+    for title in ("Bob 1", "Bob 2", "Bob 3"):
+        add_task(bob, title)
+    add_task(alice, "Keep")
+    add_task(alice, "Old")
+
+    with sharded_app.app_context():
+        alice_id, bob_id = db.session.scalars(select(User.id).order_by(User.id)).all()
+        assert (locate(alice_id), locate(bob_id)) == ("a", "b")
+        with using_shard("a"):
+            ids = titles(alice_id)
+            db.session.execute(
+                update(Task).where(Task.id == ids["Old"])
+                .values(completed=True, completed_at=datetime.now() - timedelta(days=60))
+            )
+            db.session.add_all([
+                TaskReminder(task_id=ids["Keep"], user_id=alice_id, due_date=datetime(2099, 1, 1)),
+                # Reminder whose task no longer exists
+                TaskReminder(task_id=99, user_id=alice_id, due_date=datetime(2099, 1, 1)),
+            ])
+            db.session.commit()
+            assert archive_completed(30, 100) == 1
+
+        assert move_user(alice_id, "b", wait=0)
+
+        with using_shard("b"):
+            moved = titles(alice_id)
+            bob_ids = set(titles(bob_id).values())
+            archived_id = db.session.scalar(select(ArchivedTask.id).where(ArchivedTask.user_id == alice_id))
+            assert moved["Keep"] not in bob_ids
+            assert archived_id not in bob_ids | set(moved.values())
+            assert db.session.scalars(
+                select(TaskReminder.task_id).where(TaskReminder.user_id == alice_id)
+            ).all() == [moved["Keep"]]
+
+    # New tasks on the shard never take the archived id, so it restores in place
+    add_task(bob, "Bob 4")
+    alice.get(f"/archive/{archived_id}/restore")
+    with sharded_app.app_context(), using_shard("b"):
+        assert titles(alice_id)["Old"] == archived_id
+        assert titles(bob_id)["Bob 4"] != archived_id
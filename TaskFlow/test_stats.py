@@ -0,0 +1,47 @@
+from collections import Counter
+from conftest import create_task
+from models import db, User, UserTaskStat
+from stats import apply_deltas, get_user_stats, rebuild_stats
+
+
+def counters(user_id: int) -> dict:
+    """A user's counter rows as {(dimension, value): count}."""
+    rows = db.session.execute(
+        db.select(UserTaskStat.dimension, UserTaskStat.value, UserTaskStat.count)
+        .where(UserTaskStat.user_id == user_id)
+    )
+    return {(dimension, value): count for dimension, value, count in rows}
+
+
+def test_counters_follow_task_writes(client, app):
+    """Create, complete, edit and delete keep the counters exact."""
+    first = create_task(client, "First", priority="high")
+    second = create_task(client, "Second", priority="low")
+    client.get(f"/complete-task/{first}")
+    client.get(f"/delete-task/{second}")
+
+    with app.app_context():
+        user_id = db.session.scalar(db.select(User.id))
+        stats = get_user_stats(user_id)
+        assert (stats["total"], stats["pending"], stats["completed"]) == (1, 0, 1)
+        assert stats["priority"] == {"high": 1}
+        assert stats["category"] == {"general": 1}
+
+        before = counters(user_id)
+        rebuild_stats(user_id)
+        db.session.commit()
+        assert counters(user_id) == {key: count for key, count in before.items() if count}
+
+
+def test_apply_deltas_upserts_existing_and_new_rows(app):
+    """A delta for a counter that already exists adds to it instead of failing."""
+    with app.app_context():
+        user = User(username="dave", email="dave@example.com", first_name="D", last_name="D")
+        user.set_password("abc123")
+        db.session.add(user)
+        db.session.commit()
+
+        apply_deltas(user.id, Counter({("priority", "high"): 2}))
+        apply_deltas(user.id, Counter({("priority", "high"): 1, ("status", "pending"): 3}))
+        db.session.commit()
+        assert counters(user.id) == {("priority", "high"): 3, ("status", "pending"): 3}
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from conftest import create_task, make_app, register
+from sync import encode_cursor
+
+
+def test_cursor_pages_through_changes_and_deletes(tmp_path):
+    """Pages follow the cursor, and later syncs only see what changed since."""
+    app = make_app(tmp_path, SYNC_CLOCK_SKEW_SECONDS=0)
+    client = app.test_client()
+    register(client, "alice")
+    ids = [create_task(client, title) for title in ("First", "Second", "Third")]
+
+    first = client.get("/api/changes?limit=2").get_json()
+    assert [task["id"] for task in first["tasks"]] == ids[:2]
+    assert first["has_more"]
+
+    second = client.get(f"/api/changes?limit=2&cursor={first['cursor']}").get_json()
+    assert [task["id"] for task in second["tasks"]] == ids[2:]
+    assert not second["has_more"]
+
+    client.get(f"/complete-task/{ids[0]}")
+    client.get(f"/delete-task/{ids[1]}")
+    third = client.get(f"/api/changes?cursor={second['cursor']}").get_json()
+    assert [(task["id"], task["completed"]) for task in third["tasks"]] == [(ids[0], True)]
+    assert third["deleted"] == [ids[1]]
+
+
+def test_stale_cursors_are_gone(client):
+    """Cursors past tombstone retention or from another shard get 410."""
+    now = datetime.now()
+    expired = encode_cursor((now, 0), (now - timedelta(days=31), 0), "main")
+    response = client.get(f"/api/changes?cursor={expired}")
+    assert response.status_code == 410
+    assert "expired" in response.get_json()["error"]
+
+    moved = encode_cursor((now, 0), (now, 0), "a")
+    response = client.get(f"/api/changes?cursor={moved}")
+    assert response.status_code == 410
+    assert "moved" in response.get_json()["error"]
+
+    assert client.get("/api/changes?cursor=not-a-cursor").status_code == 400
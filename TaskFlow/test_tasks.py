@@ -0,0 +1,61 @@
+from conftest import create_task
+from models import db, Task
+
+
+def edit_form(app, task_id: int, **fields) -> dict:
+    """Edit form data as rendered for the task's current version."""
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        form = {
+            "title": task.title,
+            "description": "Edited",
+            "priority": task.priority,
+            "version": str(task.version),
+            "original_priority": task.priority,
+            "original_category": str(task.category_id),
+        }
+    return {**form, **fields}
+
+
+def test_edit_bumps_version(client, app):
+    """A saved edit returns to the dashboard and increments the version."""
+    task_id = create_task(client)
+    response = client.post(f"/edit-task/{task_id}", data=edit_form(app, task_id, title="Renamed"))
+    assert response.location.endswith("/dashboard")
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        assert (task.title, task.version) == ("Renamed", 2)
+
+
+def test_stale_edit_is_a_conflict(client, app):
+    """An edit made against an older version is refused and sent back to the form."""
+    task_id = create_task(client)
+    stale = edit_form(app, task_id, title="Stale")
+    client.post(f"/edit-task/{task_id}", data=edit_form(app, task_id, title="Fresh"))
+
+    response = client.post(f"/edit-task/{task_id}", data=stale, follow_redirects=True)
+    assert b"changed elsewhere" in response.data
+    with app.app_context():
+        assert db.session.get(Task, task_id).title == "Fresh"
+
+
+def test_edit_without_version_is_rejected(client, app):
+    """A post missing the version fields is a bad request, not a conflict."""
+    task_id = create_task(client)
+    form = edit_form(app, task_id)
+    del form["version"]
+    assert client.post(f"/edit-task/{task_id}", data=form).status_code == 400
+
+
+def test_edit_of_another_users_task_is_not_found(client, app):
+    """Writes are scoped to the owner."""
+    from conftest import register
+
+    task_id = create_task(client)
+    other = app.test_client()
+    register(other, "mallory")
+    response = other.post(f"/edit-task/{task_id}", data=edit_form(app, task_id), follow_redirects=True)
+    assert b"not found" in response.data
+    assert other.get(f"/delete-task/{task_id}", follow_redirects=True).status_code == 200
+    with app.app_context():
+        assert db.session.get(Task, task_id) is not None
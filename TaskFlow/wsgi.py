@@ -0,0 +1,12 @@
+"""
+Production WSGI entry point:
+Builds the app from the environment for a WSGI server such as Gunicorn.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+from app import create_app
+
+
+app = create_app(os.environ.get("TASKFLOW_CONFIG", "production"))